@@ -0,0 +1,111 @@
+import datetime
+import queue
+import threading
+
+import numpy as np
+
+# Seeded OrcasRush levels: pipe i's gap top and size depend only on the seed and on the
+# chunk of CHUNK_SIZE pipes it falls in, so any pipe (and so any distance) can be looked
+# up without generating the ones before it. Gaps tighten from EASY_GAPS to HARD_GAPS over
+# the first CURVE_PIPES pipes, the score being the number of pipes spawned.
+SCREEN_HEIGHT = 700  # Same as OrcaRush.SCREEN_HEIGHT
+PIPE_SPAWN_DISTANCE = 300  # Same as Game.pipe_spawn_distance
+PIPE_MARGIN = 100  # Closest a gap gets to the top and bottom of the screen
+FIRST_GAP = 200  # The first pipe of a run
+EASY_GAPS = (180, 300)  # Smallest and largest gaps at the start of a run
+HARD_GAPS = (140, 200)  # Smallest and largest gaps once the curve is over
+CURVE_PIPES = 50
+CHUNK_SIZE = 32
+LOOKAHEAD = 2  # Chunks generated ahead of the one being played
+SEED_RANGE = 2 ** 32  # Seeds are reduced to 0 <= seed < SEED_RANGE, so any int names a level
+
+def daily_seed(date=None):
+    """The seed everybody shares on date (default today), e.g. 20261018."""
+    date = date or datetime.date.today()
+    return date.year * 10000 + date.month * 100 + date.day
+
+def normalize_seed(seed):
+    """The level seed an int stands for, e.g. -1 for 2 ** 32 - 1."""
+    return seed % SEED_RANGE
+
+def gap_range(index):
+    """Smallest and largest gap sizes for pipe index (an int or an array of them)."""
+    progress = np.minimum(np.asarray(index) / CURVE_PIPES, 1.0)
+    low = np.rint(EASY_GAPS[0] + (HARD_GAPS[0] - EASY_GAPS[0]) * progress).astype(np.int64)
+    high = np.rint(EASY_GAPS[1] + (HARD_GAPS[1] - EASY_GAPS[1]) * progress).astype(np.int64)
+    return low, high
+
+def make_chunk(seed, number, size=CHUNK_SIZE):
+    """Return (gap tops, gap sizes) arrays of pipes number * size to (number + 1) * size of level seed."""
+    rng = np.random.default_rng([normalize_seed(seed), number])
+    low, high = gap_range(np.arange(number * size, (number + 1) * size))
+    gaps = rng.integers(low, high, endpoint=True)
+    if number == 0:
+        gaps[0] = FIRST_GAP
+    tops = rng.integers(PIPE_MARGIN, SCREEN_HEIGHT - gaps - PIPE_MARGIN, endpoint=True)
+    return tops, gaps
+
+def pipe_layout(seed, count, size=CHUNK_SIZE):
+    """Return (gap tops, gap sizes) arrays of the first count pipes of level seed."""
+    chunks = [make_chunk(seed, number, size) for number in range(-(-count // size))]
+    return (np.concatenate([tops for tops, _ in chunks])[:count],
+            np.concatenate([gaps for _, gaps in chunks])[:count])
+
+class LevelStream:
+    def __init__(self, seed, chunk_size=CHUNK_SIZE, lookahead=LOOKAHEAD, spawn_distance=PIPE_SPAWN_DISTANCE):
+        """Serve the pipes of level seed, generating chunks ahead on a background thread."""
+        self.chunk_size = chunk_size
+        self.lookahead = lookahead
+        self.spawn_distance = spawn_distance
+        self.chunks = {}  # (seed, chunk number) -> (gap tops, gap sizes) lists
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.fill_chunks, daemon=True)
+        self.thread.start()
+        self.restart(seed)
+
+    def fill_chunks(self):
+        while True:
+            key = self.requests.get()
+            if key in self.chunks:
+                continue
+            try:
+                self.chunks[key] = self.make_chunk(key)
+            except Exception:
+                # Keep serving; pipe() generates this chunk itself and raises there instead
+                continue
+
+    def make_chunk(self, key):
+        tops, gaps = make_chunk(*key, self.chunk_size)
+        return tops.tolist(), gaps.tolist()
+
+    def restart(self, seed):
+        """Switch to level seed, dropping the chunks of the previous one."""
+        self.seed = normalize_seed(seed)
+        self.chunks = {}
+        self.current = None  # Chunk number of the last pipe looked up
+        self.seek(0)
+
+    def seek(self, distance):
+        """Return the index of the pipe spawned at distance, queueing its chunk and the ones ahead."""
+        index = distance // self.spawn_distance
+        number = index // self.chunk_size
+        for ahead in range(number, number + self.lookahead + 1):
+            self.requests.put((self.seed, ahead))
+        return index
+
+    def pipe(self, index):
+        """Return (gap top, gap size) of pipe index, generating its chunk on the spot only if it isn't ready."""
+        number, offset = divmod(index, self.chunk_size)
+        key = (self.seed, number)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = self.make_chunk(key)
+        if number != self.current:
+            # Entering a new chunk: forget the ones behind and queue the ones ahead
+            self.current = number
+            for old in list(self.chunks):
+                if old[0] != self.seed or old[1] < number - 1:
+                    self.chunks.pop(old, None)
+            self.seek(index * self.spawn_distance)
+        tops, gaps = chunk
+        return tops[offset], gaps[offset]
@@ -1,7 +1,13 @@
 import pygame
+import argparse
 import os
 import sys
 import random
+import struct
+from array import array
+from collections import deque
+
+from OrcaLevel import LevelStream, daily_seed, normalize_seed
 
 # SCREEN WIDTH and SCREEN HEIGHT
 SCREEN_WIDTH = 900
@@ -16,6 +22,13 @@ RED = (255, 0, 0)
 
 FPS = 60
 
+# Test collisions against the images' opaque pixels instead of their whole rectangles
+PIXEL_PERFECT = False
+
+MAX_GHOSTS = 200  # Best runs kept as ghosts
+GHOST_TINT = (150, 200, 255, 80)  # Multiplied into the orca image, alpha included
+GHOST_HEADER = struct.Struct('<IiiI')  # Seed, start y, score and length of a saved ghost
+
 # Global function to get the resource path
 def resourcePath(relativePath):
     try:
@@ -24,10 +37,45 @@ def resourcePath(relativePath):
         basePath = os.path.abspath(os.path.dirname(__file__))  # Updated to the OrcasRush folder
     return os.path.join(basePath, relativePath)
 
+# Images loaded so far, shared by every Fish and Pipe
+imageCache = {}
+
+# Load an image from disk once, converted to the display's pixel format when there is a display
+def loadImage(relativePath):
+    image = imageCache.get(relativePath)
+    if image is None:
+        image = pygame.image.load(resourcePath(relativePath))
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()  # Blits then skip the per-pixel format conversion
+        imageCache[relativePath] = image
+    return image
+
+# Copy of an image with color multiplied into every pixel, made once per image and color
+def loadTintedImage(relativePath, color):
+    key = (relativePath, color)
+    image = imageCache.get(key)
+    if image is None:
+        image = loadImage(relativePath).copy()
+        image.fill(color, special_flags=pygame.BLEND_RGBA_MULT)
+        imageCache[key] = image
+    return image
+
+# Collision masks built so far, one per image
+maskCache = {}
+
+# Build an image's collision mask once
+def loadMask(relativePath):
+    mask = maskCache.get(relativePath)
+    if mask is None:
+        mask = pygame.mask.from_surface(loadImage(relativePath))
+        maskCache[relativePath] = mask
+    return mask
+
 # Defining Fish object
 class Fish:
     def __init__(self):
-        self.image = pygame.image.load(resourcePath('assets/orca.png'))
+        self.image = loadImage('assets/orca.png')
+        self.mask = loadMask('assets/orca.png')
         self.sound = pygame.mixer.Sound(resourcePath('assets/swim.wav'))
         self.rect = self.image.get_rect()
         self.width = self.image.get_rect().width
@@ -71,16 +119,21 @@ class Pipe:
         """
         difficulty_gap: Defines the distance between the upper and lower pipes.
         """
-        self.pipe_image = pygame.image.load(resourcePath('assets/pipe01.png'))
+        self.pipe_image = loadImage('assets/pipe01.png')
+        self.pipe_mask = loadMask('assets/pipe01.png')
         self.pipe_rect_top = self.pipe_image.get_rect()
         self.pipe_rect_bottom = self.pipe_image.get_rect()
-        self.gap_size = difficulty_gap  # The distance between the top and bottom pipes
+        self.reset(difficulty_gap)
 
-        self.setPos()
+    def reset(self, difficulty_gap, pipe_height=None):
+        # Reuse this pipe as a new one, keeping its rects
+        self.gap_size = difficulty_gap  # The distance between the top and bottom pipes
+        self.setPos(pipe_height)
 
-    def setPos(self):
-        # Random height for top pipe, bottom pipe will be calculated based on this height and gap_size
-        pipe_height = random.randint(100, SCREEN_HEIGHT - self.gap_size - 100)
+    def setPos(self, pipe_height=None):
+        # Random height for top pipe unless the level gives one, bottom pipe will be calculated based on this height and gap_size
+        if pipe_height is None:
+            pipe_height = random.randint(100, SCREEN_HEIGHT - self.gap_size - 100)
 
         # Setting positions for top and bottom pipes
         self.pipe_rect_top.x = SCREEN_WIDTH
@@ -97,10 +150,15 @@ class Pipe:
     def outOfScreen(self):
         return self.pipe_rect_top.x + self.pipe_rect_top.width <= 0
 
-    def checkCollision(self, fish):
+    def checkCollision(self, fish, pixelPerfect=PIXEL_PERFECT):
         # Check collision with top and bottom pipes
-        if self.pipe_rect_top.colliderect(fish.rect) or self.pipe_rect_bottom.colliderect(fish.rect):
-            return True
+        for rect in (self.pipe_rect_top, self.pipe_rect_bottom):
+            if rect.colliderect(fish.rect):
+                if not pixelPerfect:
+                    return True
+                # The rectangles overlap, so check whether any opaque pixels do too
+                if self.pipe_mask.overlap(fish.mask, (fish.rect.x - rect.x, fish.rect.y - rect.y)):
+                    return True
         return False
 
     def draw(self, screen):
@@ -108,20 +166,93 @@ class Pipe:
         screen.blit(self.pipe_image, self.pipe_rect_top)
         screen.blit(self.pipe_image, self.pipe_rect_bottom)
 
+# Pipes that left the screen, kept for reuse so spawning allocates nothing
+class PipePool:
+    def __init__(self, size=0):
+        self.free = [Pipe() for _ in range(size)]
+
+    def acquire(self, difficulty_gap=200, pipe_height=None):
+        if self.free:
+            pipe = self.free.pop()
+            pipe.reset(difficulty_gap, pipe_height)
+            return pipe
+        pipe = Pipe(difficulty_gap)
+        pipe.setPos(pipe_height)
+        return pipe
+
+    def release(self, pipe):
+        self.free.append(pipe)
+
+# A finished run: the fish's y at the start, then how far it moved each tick
+class Ghost:
+    def __init__(self, seed, start, deltas, score):
+        self.seed = seed  # Level the run was played on
+        self.start = start
+        self.deltas = deltas  # array('b'): the fish never moves more than 10.5 pixels a tick, so one byte a tick
+        self.score = score
+
+# The best runs, for racing their ghosts on the same level
+class GhostBook:
+    def __init__(self, size=MAX_GHOSTS):
+        self.size = size
+        self.ghosts = []  # Best first
+
+    def add(self, ghost):
+        self.ghosts.append(ghost)
+        self.ghosts.sort(key=lambda ghost: (ghost.score, len(ghost.deltas)), reverse=True)
+        del self.ghosts[self.size:]
+
+    def runsOn(self, seed):
+        return [ghost for ghost in self.ghosts if ghost.seed == seed]
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            for ghost in self.ghosts:
+                file.write(GHOST_HEADER.pack(ghost.seed, ghost.start, ghost.score, len(ghost.deltas)))
+                ghost.deltas.tofile(file)
+
+    def load(self, path):
+        # A file cut short, e.g. by a crash while saving, keeps the ghosts before the cut
+        with open(path, 'rb') as file:
+            while header := file.read(GHOST_HEADER.size):
+                try:
+                    seed, start, score, length = GHOST_HEADER.unpack(header)
+                    deltas = array('b')
+                    deltas.fromfile(file, length)
+                except (struct.error, EOFError):
+                    break
+                self.add(Ghost(seed, start, deltas, score))
+
 # Defining Game Object
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None):
+        """
+        seed: Level every run plays, for shared and daily courses. A fresh random level per run if None.
+        """
         self.font_large = pygame.font.SysFont("FixedSys", 50, True, False)
         self.font_medium = pygame.font.SysFont("FixedSys", 40, True, False)
         pygame.mixer.music.load(resourcePath('assets/bgm.mp3'))
         self.fish = Fish()
-        self.pipes = [Pipe(difficulty_gap=200)]  # Initial difficulty gap
         self.pipe_spawn_distance = 300  # Distance for spawning new pipes
+        # Enough pipes for a full screen of them, plus the one leaving and the one arriving
+        self.pipePool = PipePool(SCREEN_WIDTH // self.pipe_spawn_distance + 2)
+        self.seed = seed
+        self.runSeed = self.nextSeed()  # Level of the current run
+        self.level = LevelStream(self.runSeed, spawn_distance=self.pipe_spawn_distance)
+        self.pipeIndex = 0  # Index in the level of the next pipe to spawn
+        # Pipes all spawn at the right edge and scroll at the same speed, so the deque stays ordered by x
+        self.pipes = deque([self.newPipe()])
+        self.ghosts = GhostBook()
+        self.ghostImage = loadTintedImage('assets/orca.png', GHOST_TINT)
+        self.recording = None  # Deltas of the run being played
+        self.racing = []  # [deltas, y] of the ghosts on this run's level that are still going
+        self.tick = 0
         self.distance_since_last_pipe = 0  # Tracks distance covered since last pipe was added
         self.score = 0
         self.best_score = 0  # Tracks the best score
         self.menuOn = True
         self.gameOver = False
+        self.pixelPerfect = PIXEL_PERFECT
 
     def processEvents(self):
         for event in pygame.event.get():
@@ -135,37 +266,83 @@ class Game:
                         self.menuOn = False
                         self.gameOver = False
                         self.fish.reset()
-                        self.pipes = [Pipe(difficulty_gap=200)]  # Reset pipes for new game
+                        for pipe in self.pipes:
+                            self.pipePool.release(pipe)
+                        self.pipes.clear()
+                        self.runSeed = self.nextSeed()
+                        self.level.restart(self.runSeed)
+                        self.pipeIndex = 0
+                        self.pipes.append(self.newPipe())  # Reset pipes for new game
+                        self.recording = array('b')
+                        self.racing = [[ghost.deltas, ghost.start] for ghost in self.ghosts.runsOn(self.runSeed)]
+                        self.tick = 0
                         self.distance_since_last_pipe = 0  # Reset pipe distance
+                    elif event.key == pygame.K_p:
+                        self.pixelPerfect = not self.pixelPerfect  # Toggle pixel-perfect collisions
             else:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         self.fish.swim()
         return False
 
+    def nextSeed(self):
+        # Reduced once here to the levels' seed range, which the ghost files also store
+        return normalize_seed(self.seed) if self.seed is not None else random.getrandbits(32)
+
+    def newPipe(self):
+        # The level's next pipe, looked up in its precomputed chunks
+        pipe_height, gap = self.level.pipe(self.pipeIndex)
+        self.pipeIndex += 1
+        return self.pipePool.acquire(gap, pipe_height)
+
+    def endRun(self):
+        if self.gameOver:
+            return
+        pygame.mixer.music.stop()
+        self.gameOver = True
+        if self.score > self.best_score:  # Update best score if new high score
+            self.best_score = self.score
+        self.ghosts.add(Ghost(self.runSeed, self.fish.rect.y - sum(self.recording), self.recording, self.score))
+
+    def moveGhosts(self):
+        # Replay this tick of every ghost, dropping the ones whose run ended
+        racing = []
+        for ghost in self.racing:
+            deltas = ghost[0]
+            if self.tick < len(deltas):
+                ghost[1] += deltas[self.tick]
+                racing.append(ghost)
+        self.racing = racing
+
     def runLogic(self):
         if not self.menuOn and not self.gameOver:
-            if self.fish.update():  # If fish hits the bottom, trigger game over
-                pygame.mixer.music.stop()
-                self.gameOver = True
-                if self.score > self.best_score:  # Update best score if new high score
-                    self.best_score = self.score
+            lastY = self.fish.rect.y
+            fishHitBottom = self.fish.update()
+            self.recording.append(self.fish.rect.y - lastY)
+            self.moveGhosts()
+            self.tick += 1
+            if fishHitBottom:  # If fish hits the bottom, trigger game over
+                self.endRun()
 
             self.distance_since_last_pipe += 4  # Increment the distance covered by pipes
             if self.distance_since_last_pipe >= self.pipe_spawn_distance:
-                self.pipes.append(Pipe(difficulty_gap=random.randint(180, 300)))  # Add pipe with random gap size
+                self.pipes.append(self.newPipe())  # Add the level's next pipe, its gap tightening as the score rises
                 self.distance_since_last_pipe = 0  # Reset distance tracker
                 self.score += 1  # Increase score after new pipe appears
 
             for pipe in self.pipes:
                 pipe.update()
-                if pipe.outOfScreen():
-                    self.pipes.remove(pipe)  # Remove pipes that go off-screen to free memory
-                if pipe.checkCollision(self.fish):
-                    pygame.mixer.music.stop()
-                    self.gameOver = True
-                    if self.score > self.best_score:
-                        self.best_score = self.score
+            # Only the leftmost pipes can go off-screen; keep them for reuse
+            while self.pipes and self.pipes[0].outOfScreen():
+                self.pipePool.release(self.pipes.popleft())
+
+            # Only pipes overlapping the fish horizontally can hit it, and they're near the head
+            for pipe in self.pipes:
+                if pipe.pipe_rect_top.left >= self.fish.rect.right:
+                    break  # This pipe and every one after it are still ahead of the fish
+                if pipe.pipe_rect_top.right > self.fish.rect.left and pipe.checkCollision(self.fish, self.pixelPerfect):
+                    self.endRun()
+                    break
 
     def drawText(self, screen, text, font, x, y, color):
         textObj = font.render(text, True, color)
@@ -173,11 +350,15 @@ class Game:
         textRect.center = (x, y)
         screen.blit(textObj, textRect)
 
+    def collisionLabel(self):
+        return f"Collisions: {'Pixel' if self.pixelPerfect else 'Box'} (P to toggle)"
+
     def displayMenu(self, screen):
         screen.fill(SEA)
         centerX = SCREEN_WIDTH // 2
         centerY = SCREEN_HEIGHT // 2
         self.drawText(screen, "Press Space Key to Start", self.font_large, centerX, centerY, DARK_GROUND)
+        self.drawText(screen, self.collisionLabel(), self.font_medium, centerX, centerY + 80, WHITE)
         pygame.display.update()
 
     def displayGameOver(self, screen):
@@ -187,12 +368,15 @@ class Game:
         self.drawText(screen, "Game Over!", self.font_large, centerX, centerY - 50, RED)
         self.drawText(screen, f"Score: {self.score}, Best: {self.best_score}", self.font_medium, centerX, centerY + 50, WHITE)
         self.drawText(screen, "Press Space to Play Again", self.font_medium, centerX, centerY + 150, WHITE)
+        self.drawText(screen, self.collisionLabel(), self.font_medium, centerX, centerY + 220, WHITE)
         pygame.display.update()
 
     def displayFrame(self, screen):
         screen.fill(SEA)
         pygame.draw.rect(screen, GROUND, (0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50))
         pygame.draw.line(screen, DARK_GROUND, (0, SCREEN_HEIGHT - 50), (SCREEN_WIDTH, SCREEN_HEIGHT - 50), 4)
+        # Every ghost shares the fish's x and one tinted image, so they all go in a single blits call
+        screen.blits([(self.ghostImage, (self.fish.rect.x, y)) for _, y in self.racing], False)
         self.fish.draw(screen)
         for pipe in self.pipes:
             pipe.draw(screen)
@@ -201,11 +385,19 @@ class Game:
 
 # Main function
 def main():
+    parser = argparse.ArgumentParser(description="Orca's Rush")
+    parser.add_argument('--seed', type=int, default=None, help="Play the same level every run")
+    parser.add_argument('--daily', action='store_true', help="Play today's shared level")
+    parser.add_argument('--ghosts', default=None, metavar='PATH', help="File to load and save the best runs' ghosts")
+    args = parser.parse_args()
+
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Orca's Rush")
     clock = pygame.time.Clock()
-    game = Game()
+    game = Game(daily_seed() if args.daily else args.seed)
+    if args.ghosts and os.path.exists(args.ghosts):
+        game.ghosts.load(args.ghosts)
     done = False
     while not done:
         done = game.processEvents()
@@ -217,6 +409,8 @@ def main():
             game.runLogic()
             game.displayFrame(screen)
             clock.tick(FPS)
+    if args.ghosts:
+        game.ghosts.save(args.ghosts)
     pygame.quit()
 
 if __name__ == '__main__':
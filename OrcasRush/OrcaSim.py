@@ -0,0 +1,106 @@
+import numpy as np
+
+from OrcaLevel import PIPE_SPAWN_DISTANCE, pipe_layout
+
+# Pygame-free replica of an OrcaRush run: Fish.update, Pipe movement and the rect
+# collisions of Game.runLogic, for a whole population of fish stepped in lockstep as
+# NumPy arrays. Every fish in a population flies through the same pipes, the ones of
+# the OrcaLevel level the game plays when started with the same seed.
+SCREEN_WIDTH = 900
+SCREEN_HEIGHT = 700
+FISH_X = 250  # Fish.reset
+FISH_START_Y = 250
+FISH_WIDTH = 66  # Size of assets/orca.png
+FISH_HEIGHT = 52
+PIPE_WIDTH = 100  # Size of assets/pipe01.png
+PIPE_HEIGHT = 325
+GRAVITY = 0.5
+MAX_FALL_SPEED = 10
+SWIM_SPEED = -10
+PIPE_SPEED = 4
+TICKS_PER_PIPE = -(-PIPE_SPAWN_DISTANCE // PIPE_SPEED)  # Ticks between two pipe spawns
+MAX_TICKS = 100 * TICKS_PER_PIPE  # Runs end after 100 pipes, about two minutes
+
+# Controller: a one-hidden-layer network per fish, flapping when its output is positive
+INPUTS = 5
+HIDDEN = 8
+GENOME_SIZE = INPUTS * HIDDEN + HIDDEN + HIDDEN + 1
+
+def observe(y, dy, pipe_x, gap_top, gap):
+    """Controller inputs for fish at y moving dy, facing a pipe at pipe_x with its gap from gap_top."""
+    y = np.asarray(y, dtype=np.float64)
+    return np.stack(np.broadcast_arrays(
+        (y + FISH_HEIGHT / 2 - (gap_top + gap / 2)) / SCREEN_HEIGHT,  # Height above the gap's centre
+        np.asarray(dy, dtype=np.float64) / MAX_FALL_SPEED,
+        np.asarray(pipe_x - FISH_X, dtype=np.float64) / SCREEN_WIDTH,
+        np.asarray(gap, dtype=np.float64) / SCREEN_HEIGHT,
+        y / SCREEN_HEIGHT,
+    ), axis=-1)
+
+def decide(genomes, features):
+    """Return whether each of the (count, GENOME_SIZE) genomes flaps on its row of features."""
+    count = len(genomes)
+    weights = genomes[:, :INPUTS * HIDDEN].reshape(count, INPUTS, HIDDEN)
+    biases = genomes[:, INPUTS * HIDDEN:INPUTS * HIDDEN + HIDDEN]
+    out_weights = genomes[:, INPUTS * HIDDEN + HIDDEN:-1]
+    hidden = np.tanh(np.einsum('pi,pih->ph', features, weights) + biases)
+    return np.einsum('ph,ph->p', hidden, out_weights) + genomes[:, -1] > 0
+
+class OrcaSim:
+    def __init__(self, genomes, seed, max_ticks=MAX_TICKS):
+        """One fish per row of genomes, all flying through the pipes of seed."""
+        self.genomes = genomes
+        self.count = len(genomes)
+        self.max_ticks = max_ticks
+        self.tops, self.gaps = pipe_layout(seed, max_ticks // TICKS_PER_PIPE + 2)
+        self.y = np.full(self.count, FISH_START_Y, dtype=np.int64)
+        self.dy = np.zeros(self.count)
+        self.alive = np.ones(self.count, dtype=bool)
+        self.ticks = np.zeros(self.count, dtype=np.int64)  # Ticks survived, the fatal one included
+        self.tick = 0
+        self.nearest = 0  # First pipe the fish hasn't passed yet
+
+    def pipe_x(self, index):
+        """x of pipe index after self.tick ticks; every pipe but the first moves on the tick it spawns."""
+        return SCREEN_WIDTH - PIPE_SPEED * (self.tick - index * TICKS_PER_PIPE + (index > 0))
+
+    def step(self):
+        """Play one tick for every fish still alive, as a frame of Game.processEvents and Game.runLogic."""
+        pipe = self.nearest
+        flap = decide(self.genomes, observe(self.y, self.dy, self.pipe_x(pipe), self.tops[pipe], self.gaps[pipe]))
+        self.dy[flap] = SWIM_SPEED
+
+        # Fish.update; Rect rounds the float y to the nearest pixel
+        np.minimum(self.dy + GRAVITY, MAX_FALL_SPEED, out=self.dy)
+        self.y = np.maximum(np.floor(self.y + self.dy + 0.5).astype(np.int64), 0)
+        hit = self.y + FISH_HEIGHT >= SCREEN_HEIGHT
+        self.y[hit] = SCREEN_HEIGHT - FISH_HEIGHT
+        self.dy[hit] = 0
+
+        # Pipes move, then the ones overlapping the fish horizontally are tested
+        self.tick += 1
+        while self.pipe_x(self.nearest) + PIPE_WIDTH <= FISH_X:
+            self.nearest += 1
+        pipe = self.nearest
+        while pipe * TICKS_PER_PIPE <= self.tick and self.pipe_x(pipe) < FISH_X + FISH_WIDTH:
+            top, bottom = self.tops[pipe], self.tops[pipe] + self.gaps[pipe]
+            hit |= (self.y < top) & (self.y + FISH_HEIGHT > top - PIPE_HEIGHT)
+            hit |= (self.y < bottom + PIPE_HEIGHT) & (self.y + FISH_HEIGHT > bottom)
+            pipe += 1
+
+        self.ticks[self.alive] = self.tick
+        self.alive &= ~hit
+
+    def run(self):
+        """Step until every fish has crashed or max_ticks have passed; returns the ticks each survived."""
+        while self.alive.any() and self.tick < self.max_ticks:
+            self.step()
+        return self.ticks
+
+def score(ticks):
+    """The in-game score of a run that lasted ticks: one point per pipe spawned."""
+    return ticks // TICKS_PER_PIPE
+
+def evaluate(genomes, seeds, max_ticks=MAX_TICKS):
+    """Process pool entry point: mean ticks survived by each genome over the runs of seeds."""
+    return np.mean([OrcaSim(genomes, seed, max_ticks).run() for seed in seeds], axis=0)
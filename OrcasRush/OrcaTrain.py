@@ -0,0 +1,160 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pygame
+
+import OrcaRush
+from OrcaSim import GENOME_SIZE, FISH_X, SCREEN_WIDTH, SCREEN_HEIGHT, MAX_TICKS, observe, decide, evaluate, score
+
+# Neuroevolution trainer: a population of flap controllers is scored headless by OrcaSim,
+# the best ones survive unchanged and the rest of the next generation are mutated copies
+# of them. Each generation flies through fresh seeded courses so nobody learns one layout.
+POPULATION = 256
+ELITES = 16  # Genomes kept as they are and used as parents
+MUTATION = 0.1  # Standard deviation of the noise added to a parent's weights
+RUNS = 4  # Courses each genome flies per generation
+INITIAL, COURSES, BREEDING = range(3)  # Random streams
+
+class Trainer:
+    def __init__(self, population=POPULATION, runs=RUNS, workers=None, seed=0, max_ticks=MAX_TICKS):
+        """workers > 1 spreads each generation's runs over processes."""
+        self.runs = runs
+        self.seed = seed
+        self.max_ticks = max_ticks
+        self.generation = 0
+        self.population = self.rng(INITIAL).normal(0, 1, size=(population, GENOME_SIZE))
+        self.best = self.population[0]
+        self.best_fitness = 0.0
+        self.workers = workers if workers and workers > 1 else 1
+        self.pool = ProcessPoolExecutor(workers) if self.workers > 1 else None
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def rng(self, stream):
+        # One generator per generation and use, so a resumed run carries on exactly as it would have
+        return np.random.default_rng([self.seed, self.generation, stream])
+
+    def evaluate(self):
+        """Mean ticks survived by each genome of the population over this generation's courses."""
+        seeds = self.rng(COURSES).integers(0, 2 ** 31, size=self.runs).tolist()
+        if not self.pool:
+            return evaluate(self.population, seeds, self.max_ticks)
+        chunks = np.array_split(self.population, self.workers)
+        futures = [self.pool.submit(evaluate, chunk, seeds, self.max_ticks) for chunk in chunks]
+        return np.concatenate([future.result() for future in futures])
+
+    def step(self):
+        """Score the population and breed the next one; returns the fitness of every genome."""
+        fitness = self.evaluate()
+        order = np.argsort(fitness)[::-1]
+        elites = self.population[order[:ELITES]]
+        if fitness[order[0]] >= self.best_fitness:
+            self.best, self.best_fitness = elites[0].copy(), float(fitness[order[0]])
+
+        rng = self.rng(BREEDING)
+        parents = elites[rng.integers(0, len(elites), size=len(self.population) - len(elites))]
+        children = parents + rng.normal(0, MUTATION, size=parents.shape)
+        self.population = np.concatenate([elites, children])
+        self.generation += 1
+        return fitness
+
+    def save(self, path):
+        np.savez(path, population=self.population, best=self.best, best_fitness=self.best_fitness,
+                 generation=self.generation, seed=self.seed)
+
+    def load(self, path):
+        """Carry on from a checkpoint written by save."""
+        with np.load(path) as checkpoint:
+            self.population = checkpoint['population']
+            self.best = checkpoint['best']
+            self.best_fitness = float(checkpoint['best_fitness'])
+            self.generation = int(checkpoint['generation'])
+            self.seed = int(checkpoint['seed'])
+
+def train(generations, population=POPULATION, runs=RUNS, workers=None, seed=0, checkpoints=None, resume=None):
+    """Evolve for generations, writing a checkpoint per generation into the checkpoints folder."""
+    if checkpoints:
+        os.makedirs(checkpoints, exist_ok=True)
+    start = time.perf_counter()
+    with Trainer(population, runs, workers, seed) as trainer:
+        if resume:
+            trainer.load(resume)
+        for _ in range(generations):
+            fitness = trainer.step()
+            print(f"generation {trainer.generation}: best {fitness.max():.0f} mean {fitness.mean():.0f} ticks")
+            if checkpoints:
+                trainer.save(os.path.join(checkpoints, f"generation_{trainer.generation:04d}.npz"))
+        elapsed = time.perf_counter() - start
+        return {
+            'generations': trainer.generation,
+            'best_ticks': trainer.best_fitness,
+            'best_score': score(int(trainer.best_fitness)),
+            'elapsed': elapsed,
+            'runs_per_second': generations * len(trainer.population) * runs / elapsed if elapsed else 0,
+        }
+
+def watch(path, seed=0):
+    """Let the best genome of a checkpoint play the real game, on the course of seed."""
+    with np.load(path) as checkpoint:
+        genome = checkpoint['best'][np.newaxis]
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Orca's Rush - Trained")
+    clock = pygame.time.Clock()
+    game = OrcaRush.Game(seed)  # Every run plays the level the simulation flew
+    game.pixelPerfect = False  # The simulation uses the rect collisions
+
+    done = False
+    while not done:
+        if not game.menuOn and not game.gameOver:
+            fish = game.fish
+            pipe = next(pipe for pipe in game.pipes if pipe.pipe_rect_top.right > FISH_X)
+            features = observe(fish.rect.y, fish.dy, pipe.pipe_rect_top.x, pipe.pipe_rect_top.bottom, pipe.gap_size)
+            if decide(genome, features[np.newaxis])[0]:
+                fish.swim()
+        done = game.processEvents()
+        if game.menuOn:
+            game.displayMenu(screen)
+        elif game.gameOver:
+            game.displayGameOver(screen)
+        else:
+            game.runLogic()
+            game.displayFrame(screen)
+            clock.tick(OrcaRush.FPS)
+    pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Evolve OrcasRush controllers, or watch one play.")
+    parser.add_argument('--generations', type=int, default=50)
+    parser.add_argument('--population', type=int, default=POPULATION)
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoints', default=None, help="Folder to write a checkpoint per generation into")
+    parser.add_argument('--resume', default=None, metavar='CHECKPOINT')
+    parser.add_argument('--watch', default=None, metavar='CHECKPOINT', help="Replay the checkpoint's best genome")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(args.watch, args.seed)
+        return
+    report = train(args.generations, args.population, args.runs, args.workers, args.seed, args.checkpoints,
+                   args.resume)
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
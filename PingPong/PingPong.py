@@ -27,14 +27,91 @@ EASY = 1
 MEDIUM = 2
 HARD = 3
 
+# Per-level settings, also used by the batch rally simulator
+DIFFICULTY_SETTINGS = {
+    EASY: {'opponent_speed': 2, 'opponent_error': 60, 'reaction_delay': 20, 'ball_dx': 2, 'ball_dy': 4},
+    MEDIUM: {'opponent_speed': 4, 'opponent_error': 30, 'reaction_delay': 10, 'ball_dx': 3, 'ball_dy': 5},
+    HARD: {'opponent_speed': 6, 'opponent_error': 8, 'reaction_delay': 3, 'ball_dx': 4, 'ball_dy': 7},
+}
+
+# Ball and paddle sizes and positions, also used by the batch rally simulator
+BALL_SIZE = 12
+PADDLE_WIDTH = 50
+PADDLE_HEIGHT = 15
+PADDLE_START_X = int(SCREEN_WIDTH / 2)
+PLAYER_TOP = SCREEN_HEIGHT - 40
+OPPONENT_TOP = 25
+SERVE_GAP = 10  # How far above the middle of the player's paddle serve_ball puts the ball
+
+# Most contacts the ball resolves in one tick, so a ball wedged in a corner can't loop forever
+MAX_BOUNCES = 4
+
 # Function to serve the ball
 def serve_ball(ball, player):
-    ball.rect.x = player.rect.centerx - ball.rect.width // 2
-    ball.rect.y = player.rect.centery - ball.rect.height - 10
+    ball.set_position(player.rect.centerx - ball.rect.width // 2, player.rect.centery - ball.rect.height - SERVE_GAP)
     ball.dx = 0  # Ball doesn't move horizontally before serve
     ball.dy = 0  # Ball stays on the paddle until player moves to serve
     return SERVING  # Return serving state
 
+# Time of impact of a box moving by (dx, dy) with a rect
+def swept_aabb(x, y, width, height, dx, dy, rect):
+    """Return (time, axis) of the first contact within this move, time in [0, 1] and axis the
+    one ('x' or 'y') whose faces touched, or None if the box misses or already overlaps rect."""
+    if dx > 0:
+        x_entry, x_exit = (rect.left - (x + width)) / dx, (rect.right - x) / dx
+    elif dx < 0:
+        x_entry, x_exit = (rect.right - x) / dx, (rect.left - (x + width)) / dx
+    elif x + width <= rect.left or x >= rect.right:
+        return None
+    else:
+        x_entry, x_exit = float('-inf'), float('inf')
+    if dy > 0:
+        y_entry, y_exit = (rect.top - (y + height)) / dy, (rect.bottom - y) / dy
+    elif dy < 0:
+        y_entry, y_exit = (rect.bottom - y) / dy, (rect.top - (y + height)) / dy
+    elif y + height <= rect.top or y >= rect.bottom:
+        return None
+    else:
+        y_entry, y_exit = float('-inf'), float('inf')
+
+    entry = max(x_entry, y_entry)
+    if entry >= min(x_exit, y_exit) or entry < 0 or entry > 1:
+        return None
+    return entry, 'x' if x_entry > y_entry else 'y'
+
+# Where a ball at (x, y) moving (dx, dy) per tick will be when it reaches target_y
+def predict_intercept(x, y, dx, dy, target_y, span):
+    """Return the ball's x at target_y, reflecting off the side walls at 0 and span, or None if
+    the ball is not moving towards target_y. Bounces are folded analytically, not simulated."""
+    if dy == 0:
+        return None
+    ticks = (target_y - y) / dy
+    if ticks < 0:
+        return None
+    if span <= 0:
+        return 0.0
+    # Unfold the walls into a repeating strip and fold the straight-line result back into it
+    folded = (x + dx * ticks) % (2 * span)
+    return folded if folded <= span else 2 * span - folded
+
+# Stands in for a pygame Sound where nothing should be heard (headless runs, re-simulation)
+class SilentSound():
+    def play(self):
+        pass
+
+# Wraps a pygame Sound so it plays at most once every min_interval seconds
+class RateLimitedSound():
+    def __init__(self, sound, min_interval=0.05):
+        self.sound = sound
+        self.min_interval = min_interval
+        self.last_played = float('-inf')
+
+    def play(self):
+        now = pygame.time.get_ticks() / 1000
+        if now - self.last_played >= self.min_interval:
+            self.last_played = now
+            self.sound.play()
+
 # Define resource path function
 def resource_path(relative_path):
     try:
@@ -45,50 +122,109 @@ def resource_path(relative_path):
 
 # Defining the Ball
 class Ball():
-    def __init__(self, bounceSound):
-        self.rect = pygame.Rect(int(SCREEN_WIDTH / 2), int(SCREEN_HEIGHT / 2), 12, 12)
+    def __init__(self, bounceSound, rng=random):
+        self.rect = pygame.Rect(int(SCREEN_WIDTH / 2), int(SCREEN_HEIGHT / 2), BALL_SIZE, BALL_SIZE)
+        # Exact position of the ball, rect is this rounded for drawing and scoring
+        self.x = float(self.rect.x)
+        self.y = float(self.rect.y)
         self.bounceSound = bounceSound
-        self.dx = random.randint(-3, 3)
+        self.rng = rng  # Seeded random.Random for reproducible bounces, e.g. in netplay
+        self.dx = self.rng.randint(-3, 3)
         self.dy = 5
 
+    # Moving the ball to a position
+    def set_position(self, x, y):
+        self.x = float(x)
+        self.y = float(y)
+        self.rect.x = round(self.x)
+        self.rect.y = round(self.y)
+
     # Updating the position of the ball
     def update(self, player, opponent):
-        # Check for potential collision before moving the ball
+        # A paddle that moved into the ball last tick is handled before moving
         self.check_collisions(player, opponent)
-        
-        # Move the ball after handling collisions
-        self.rect.x += self.dx
-        self.rect.y += self.dy
-        
-        # Handle when the ball goes out of the screen
-        if self.rect.left < 0 or self.rect.right > SCREEN_WIDTH:
-            self.dx *= -1
-            self.bounceSound.play()
-        if self.rect.top <= 0 or self.rect.bottom >= SCREEN_HEIGHT:
-            self.dy *= -1
-            self.bounceSound.play()
+
+        # Sweep the ball along its velocity, stopping at every contact on the way
+        remaining = 1.0  # Part of this tick's movement left
+        for _ in range(MAX_BOUNCES):
+            if remaining <= 0:
+                break
+            move_x = self.dx * remaining
+            move_y = self.dy * remaining
+            contact = self.first_contact(player, opponent, move_x, move_y)
+            if contact is None:
+                self.set_position(self.x + move_x, self.y + move_y)
+                break
+            impact, target, axis = contact
+            self.set_position(self.x + move_x * impact, self.y + move_y * impact)
+            remaining *= 1 - impact
+
+            if target == 'wall':
+                if axis == 'x':
+                    self.dx *= -1
+                else:
+                    # Top or bottom edge: stop there so runLogic scores the point
+                    self.dy *= -1
+                    remaining = 0
+                self.bounceSound.play()
+            elif axis == 'x':
+                # Glancing off the side of a paddle
+                self.dx *= -1
+                self.bounceSound.play()
+            elif target is player:
+                self.bounce_off_player(player)
+            else:
+                self.bounce_off_opponent(opponent)
+
+    # Finding the first wall or paddle the ball touches while moving by (move_x, move_y)
+    def first_contact(self, player, opponent, move_x, move_y):
+        """Return (time, target, axis) of the earliest contact, target being 'wall' or a paddle."""
+        contacts = []
+        if move_x < 0:
+            contacts.append((-self.x / move_x, 'wall', 'x'))
+        elif move_x > 0:
+            contacts.append(((SCREEN_WIDTH - self.rect.width - self.x) / move_x, 'wall', 'x'))
+        if move_y < 0:
+            contacts.append((-self.y / move_y, 'wall', 'y'))
+        elif move_y > 0:
+            contacts.append(((SCREEN_HEIGHT - self.rect.height - self.y) / move_y, 'wall', 'y'))
+
+        # Paddles only stop a ball moving towards their side, as in check_collisions
+        paddle = player if move_y > 0 else opponent if move_y < 0 else None
+        if paddle is not None:
+            hit = swept_aabb(self.x, self.y, self.rect.width, self.rect.height, move_x, move_y, paddle.rect)
+            if hit is not None:
+                contacts.append((hit[0], paddle, hit[1]))
+
+        contacts = [contact for contact in contacts if 0 <= contact[0] <= 1]
+        return min(contacts, key=lambda contact: contact[0]) if contacts else None
 
     # Check for potential collisions with the paddles
     def check_collisions(self, player, opponent):
         # Ball collision with player paddle
         if self.rect.colliderect(player.rect) and self.dy > 0:
-            self.rect.bottom = player.rect.top
-            self.dy *= -1  # Reverse the vertical direction
-            self.dx += player.dx // 2  # Add player's horizontal velocity to the ball
-            self.bounceSound.play()
+            self.set_position(self.x, player.rect.top - self.rect.height)
+            self.bounce_off_player(player)
 
         # Ball collision with opponent paddle
         elif self.rect.colliderect(opponent.rect) and self.dy < 0:
-            self.rect.top = opponent.rect.bottom
-            self.dy *= -1  # Reverse the vertical direction
-            self.dx += random.choice([-2, 2])  # Add a slight random variation
-            self.bounceSound.play()
+            self.set_position(self.x, opponent.rect.bottom)
+            self.bounce_off_opponent(opponent)
+
+    def bounce_off_player(self, player):
+        self.dy *= -1  # Reverse the vertical direction
+        self.dx += player.dx // 2  # Add player's horizontal velocity to the ball
+        self.bounceSound.play()
+
+    def bounce_off_opponent(self, opponent):
+        self.dy *= -1  # Reverse the vertical direction
+        self.dx += self.rng.choice([-2, 2])  # Add a slight random variation
+        self.bounceSound.play()
 
     # Resetting the ball's position and velocity
     def reset(self, x, y):
-        self.rect.x = x
-        self.rect.y = y
-        self.dx = random.randint(-3, 3)
+        self.set_position(x, y)
+        self.dx = self.rng.randint(-3, 3)
         self.dy = 5
 
     # Drawing the ball
@@ -98,7 +234,7 @@ class Ball():
 # Defining Player Object
 class Player():
     def __init__(self, pingSound):
-        self.rect = pygame.Rect(int(SCREEN_WIDTH / 2), SCREEN_HEIGHT - 40, 50, 15)
+        self.rect = pygame.Rect(PADDLE_START_X, PLAYER_TOP, PADDLE_WIDTH, PADDLE_HEIGHT)
         self.pingSound = pingSound
         self.dx = 0
         self.dy = 0
@@ -119,8 +255,7 @@ class Player():
 
         # When the player is serving, the ball stays on the paddle
         if is_serving:
-            ball.rect.x = self.rect.centerx - ball.rect.width // 2
-            ball.rect.y = self.rect.top - ball.rect.height
+            ball.set_position(self.rect.centerx - ball.rect.width // 2, self.rect.top - ball.rect.height)
 
         # Update the paddle position
         self.rect.x += self.dx
@@ -133,13 +268,42 @@ class Player():
 # Defining Opponent
 class Opponent():
     def __init__(self, pongSound):
-        self.rect = pygame.Rect(int(SCREEN_WIDTH / 2), 25, 50, 15)
+        self.rect = pygame.Rect(PADDLE_START_X, OPPONENT_TOP, PADDLE_WIDTH, PADDLE_HEIGHT)
         self.pongSound = pongSound
         self.speed = 4  # Default opponent speed
+        self.predictive = False  # Move to where the ball will arrive instead of chasing it
+        self.error = 0  # Largest aiming error in pixels, for predictive mode
+        self.reaction_delay = 0  # Ticks before reacting to a new ball direction, for predictive mode
+        self.prediction = None
+        self.seen_velocity = None
+        self.delay_left = 0
+
+    # Predicting where to meet the ball, recomputed only when its velocity changes
+    def predict(self, ball):
+        """Return the x to move the paddle's centre to, or None to stay put while reacting."""
+        velocity = (ball.dx, ball.dy)
+        if velocity != self.seen_velocity:
+            self.seen_velocity = velocity
+            landing = predict_intercept(ball.x, ball.y, ball.dx, ball.dy, self.rect.bottom,
+                                        SCREEN_WIDTH - ball.rect.width)
+            if landing is None:
+                self.prediction = SCREEN_WIDTH / 2  # Ball is heading away, wait in the middle
+            else:
+                self.prediction = landing + ball.rect.width / 2 + random.uniform(-self.error, self.error)
+            self.delay_left = self.reaction_delay
+        if self.delay_left > 0:
+            self.delay_left -= 1
+            return None
+        return self.prediction
 
     # Update movement of the opponent
     def update(self, ball):
-        if self.rect.centerx > ball.rect.centerx:
+        if self.predictive:
+            target = self.predict(ball)
+            if target is not None:
+                step = max(-self.speed, min(self.speed, target - self.rect.centerx))
+                self.rect.x += round(step)
+        elif self.rect.centerx > ball.rect.centerx:
             self.rect.x -= self.speed
         elif self.rect.centerx < ball.rect.centerx:
             self.rect.x += self.speed
@@ -191,6 +355,8 @@ class Game():
                         self.difficulty = min(HARD, self.difficulty + 1)
                     elif event.key == pygame.K_DOWN:
                         self.difficulty = max(EASY, self.difficulty - 1)
+                    elif event.key == pygame.K_p:
+                        self.opponent.predictive = not self.opponent.predictive
                     elif event.key == pygame.K_RETURN:
                         self.state = SERVING
                         self.applyDifficultySettings()
@@ -221,18 +387,12 @@ class Game():
 
     # Apply difficulty settings to adjust game speed and opponent behavior
     def applyDifficultySettings(self):
-        if self.difficulty == EASY:
-            self.opponent.speed = 2
-            self.ball.dx = random.randint(-2, 2)
-            self.ball.dy = 4
-        elif self.difficulty == MEDIUM:
-            self.opponent.speed = 4
-            self.ball.dx = random.randint(-3, 3)
-            self.ball.dy = 5
-        elif self.difficulty == HARD:
-            self.opponent.speed = 6
-            self.ball.dx = random.randint(-4, 4)
-            self.ball.dy = 7
+        settings = DIFFICULTY_SETTINGS[self.difficulty]
+        self.opponent.speed = settings['opponent_speed']
+        self.opponent.error = settings['opponent_error']
+        self.opponent.reaction_delay = settings['reaction_delay']
+        self.ball.dx = random.randint(-settings['ball_dx'], settings['ball_dx'])
+        self.ball.dy = settings['ball_dy']
 
     # Processing the Game Logic
     def runLogic(self):
@@ -289,8 +449,10 @@ class Game():
         difficulty_text = ["Easy", "Medium", "Hard"]
         label = self.font_large.render(f"Select Difficulty: {difficulty_text[self.difficulty - 1]}", True, WHITE)
         sub_label = self.font_medium.render("Press UP/DOWN to change, ENTER to start", True, WHITE)
+        ai_label = self.font_medium.render(f"Opponent: {'Predict' if self.opponent.predictive else 'Chase'} (P to change)", True, WHITE)
         screen.blit(label, (SCREEN_WIDTH // 2 - label.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
         screen.blit(sub_label, (SCREEN_WIDTH // 2 - sub_label.get_width() // 2, SCREEN_HEIGHT // 2 + 20))
+        screen.blit(ai_label, (SCREEN_WIDTH // 2 - ai_label.get_width() // 2, SCREEN_HEIGHT // 2 + 60))
         pygame.display.update()
 
     def displayWinningSelection(self, screen):
@@ -0,0 +1,239 @@
+import argparse
+import time
+
+import numpy as np
+
+from PingPong import (SCREEN_WIDTH, SCREEN_HEIGHT, MAX_BOUNCES, BALL_SIZE, PADDLE_WIDTH, PADDLE_HEIGHT,
+                      PADDLE_START_X, PLAYER_TOP, OPPONENT_TOP, SERVE_GAP, DIFFICULTY_SETTINGS, EASY, MEDIUM, HARD)
+
+# Headless rally simulator: M independent rallies stepped in lockstep as NumPy arrays,
+# following Ball.update (swept collisions included), Player.update and Opponent.update
+# tick for tick. The player side is a scripted tracker; every point is served again at
+# once, the way Game.processEvents serves on space.
+SERVE_Y = PLAYER_TOP + PADDLE_HEIGHT // 2 - BALL_SIZE - SERVE_GAP  # serve_ball's y, from the paddle's centery
+PLAYER_SPEED = 5  # Same as holding an arrow key
+PLAYER_DEAD_ZONE = 10  # The scripted player stops once its paddle is this close to its aim
+PLAYER_ERROR = 20  # The scripted player aims up to this many pixels off, drawn per rally
+DIFFICULTIES = {'easy': EASY, 'medium': MEDIUM, 'hard': HARD}
+
+class BatchRally:
+    def __init__(self, count, difficulty=MEDIUM, predictive=False, player_error=PLAYER_ERROR, seed=None):
+        settings = DIFFICULTY_SETTINGS[difficulty]
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.predictive = predictive
+        self.player_error = player_error
+        self.opponent_speed = settings['opponent_speed']
+        self.opponent_error = settings['opponent_error']
+        self.reaction_delay = settings['reaction_delay']
+
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.dx = np.zeros(count, dtype=np.int64)
+        self.dy = np.zeros(count, dtype=np.int64)
+        self.player_x = np.full(count, PADDLE_START_X, dtype=np.int64)
+        self.player_dx = np.zeros(count, dtype=np.int64)
+        self.opponent_x = np.full(count, PADDLE_START_X, dtype=np.int64)
+        self.aim = np.zeros(count)
+        self.rally_ticks = np.zeros(count, dtype=np.int64)
+        # Opponent.predict state
+        self.prediction = np.full(count, SCREEN_WIDTH / 2)
+        self.seen_dx = np.zeros(count, dtype=np.int64)
+        self.seen_dy = np.zeros(count, dtype=np.int64)
+        self.delay_left = np.zeros(count, dtype=np.int64)
+
+        self.rally_lengths = []
+        self.player_points = 0
+        self.opponent_points = 0
+        self.ticks = 0
+        self.serve(np.arange(count))
+
+    def serve(self, index):
+        """Put the ball on the player's paddle and serve it, as serve_ball and a space press do."""
+        self.x[index] = self.player_x[index] + PADDLE_WIDTH // 2 - BALL_SIZE // 2
+        self.y[index] = SERVE_Y
+        self.dx[index] = self.rng.choice([-3, 3], size=len(index))
+        self.dy[index] = -5
+        self.aim[index] = self.rng.uniform(-self.player_error, self.player_error, size=len(index))
+        self.rally_ticks[index] = 0
+
+    def player_policy(self):
+        """Scripted player: hold left or right towards the ball plus this rally's aiming error."""
+        offset = np.round(self.x) + BALL_SIZE // 2 + self.aim - (self.player_x + PADDLE_WIDTH // 2)
+        self.player_dx = np.where(offset > PLAYER_DEAD_ZONE, PLAYER_SPEED,
+                                  np.where(offset < -PLAYER_DEAD_ZONE, -PLAYER_SPEED, 0))
+
+    def update_ball(self):
+        """Vectorized Ball.update: check_collisions, then the swept move."""
+        x, y, dx, dy = self.x, self.y, self.dx, self.dy
+        bounce = self.rng.choice([-2, 2], size=self.count)  # Ball.bounce_off_opponent's variation
+
+        # A paddle that moved into the ball
+        left, top = np.round(x), np.round(y)
+        overlaps_player = ((left < self.player_x + PADDLE_WIDTH) & (left + BALL_SIZE > self.player_x)
+                           & (top < PLAYER_TOP + PADDLE_HEIGHT) & (top + BALL_SIZE > PLAYER_TOP))
+        overlaps_opponent = ((left < self.opponent_x + PADDLE_WIDTH) & (left + BALL_SIZE > self.opponent_x)
+                             & (top < OPPONENT_TOP + PADDLE_HEIGHT) & (top + BALL_SIZE > OPPONENT_TOP))
+        hit_player = overlaps_player & (dy > 0)
+        hit_opponent = overlaps_opponent & (dy < 0) & ~hit_player
+        y[hit_player] = PLAYER_TOP - BALL_SIZE
+        y[hit_opponent] = OPPONENT_TOP + PADDLE_HEIGHT
+        dy[hit_player | hit_opponent] *= -1
+        dx[hit_player] += self.player_dx[hit_player] // 2
+        dx[hit_opponent] += bounce[hit_opponent]
+
+        remaining = np.ones(self.count)
+        for _ in range(MAX_BOUNCES):
+            active = remaining > 0
+            if not active.any():
+                break
+            move_x = dx * remaining
+            move_y = dy * remaining
+            with np.errstate(divide='ignore', invalid='ignore'):
+                wall_x = np.where(move_x < 0, -x / move_x, (SCREEN_WIDTH - BALL_SIZE - x) / move_x)
+                wall_y = np.where(move_y < 0, -y / move_y, (SCREEN_HEIGHT - BALL_SIZE - y) / move_y)
+                wall_x[move_x == 0] = np.inf
+                wall_y[move_y == 0] = np.inf
+
+                # swept_aabb against the paddle the ball is heading for
+                towards_player = move_y > 0
+                paddle_left = np.where(towards_player, self.player_x, self.opponent_x)
+                paddle_top = np.where(towards_player, PLAYER_TOP, OPPONENT_TOP)
+                paddle_right = paddle_left + PADDLE_WIDTH
+                paddle_bottom = paddle_top + PADDLE_HEIGHT
+                x_entry = np.where(move_x > 0, (paddle_left - (x + BALL_SIZE)) / move_x, (paddle_right - x) / move_x)
+                x_exit = np.where(move_x > 0, (paddle_right - x) / move_x, (paddle_left - (x + BALL_SIZE)) / move_x)
+                y_entry = np.where(move_y > 0, (paddle_top - (y + BALL_SIZE)) / move_y, (paddle_bottom - y) / move_y)
+                y_exit = np.where(move_y > 0, (paddle_bottom - y) / move_y, (paddle_top - (y + BALL_SIZE)) / move_y)
+            still_x = move_x == 0
+            x_entry[still_x] = -np.inf
+            x_exit[still_x] = np.inf
+            missed = still_x & ((x + BALL_SIZE <= paddle_left) | (x >= paddle_right))
+            entry = np.maximum(x_entry, y_entry)
+            missed |= (move_y == 0) | (entry >= np.minimum(x_exit, y_exit)) | (entry < 0) | (entry > 1)
+            paddle = np.where(missed, np.inf, entry)
+            side_hit = x_entry > y_entry
+
+            contacts = np.stack([wall_x, wall_y, paddle])
+            contacts[(contacts < 0) | (contacts > 1)] = np.inf
+            target = np.argmin(contacts, axis=0)
+            impact = contacts[target, np.arange(self.count)]
+            hit = active & np.isfinite(impact)
+            free = active & ~hit
+
+            x[free] += move_x[free]
+            y[free] += move_y[free]
+            remaining[free] = 0
+            x[hit] += move_x[hit] * impact[hit]
+            y[hit] += move_y[hit] * impact[hit]
+            remaining[hit] *= 1 - impact[hit]
+
+            wall_x_hit = hit & (target == 0)
+            wall_y_hit = hit & (target == 1)
+            paddle_hit = hit & (target == 2)
+            face_hit = paddle_hit & ~side_hit
+            dx[wall_x_hit | (paddle_hit & side_hit)] *= -1
+            dy[wall_y_hit | face_hit] *= -1
+            remaining[wall_y_hit] = 0  # Goal edge: runLogic scores it
+            player_face = face_hit & towards_player
+            opponent_face = face_hit & ~towards_player
+            dx[player_face] += self.player_dx[player_face] // 2
+            dx[opponent_face] += bounce[opponent_face]
+
+    def update_player(self):
+        """Vectorized Player.update, horizontal only."""
+        stop = (((self.player_x <= 0) & (self.player_dx < 0))
+                | ((self.player_x + PADDLE_WIDTH >= SCREEN_WIDTH) & (self.player_dx > 0)))
+        self.player_dx[stop] = 0
+        self.player_x += self.player_dx
+
+    def update_opponent(self):
+        """Vectorized Opponent.update, chasing or predictive."""
+        centre = self.opponent_x + PADDLE_WIDTH // 2
+        if not self.predictive:
+            ball_centre = np.round(self.x).astype(np.int64) + BALL_SIZE // 2
+            self.opponent_x += np.where(centre > ball_centre, -self.opponent_speed,
+                                        np.where(centre < ball_centre, self.opponent_speed, 0))
+            return
+
+        # predict_intercept, for the balls whose velocity changed since the last prediction
+        changed = (self.dx != self.seen_dx) | (self.dy != self.seen_dy)
+        if changed.any():
+            self.seen_dx[changed] = self.dx[changed]
+            self.seen_dy[changed] = self.dy[changed]
+            x, y, dx, dy = self.x[changed], self.y[changed], self.dx[changed], self.dy[changed]
+            span = SCREEN_WIDTH - BALL_SIZE
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ticks = (OPPONENT_TOP + PADDLE_HEIGHT - y) / dy
+            folded = np.mod(x + dx * ticks, 2 * span)
+            landing = np.where(folded <= span, folded, 2 * span - folded)
+            aimed = landing + BALL_SIZE / 2 + self.rng.uniform(-self.opponent_error, self.opponent_error, size=len(x))
+            self.prediction[changed] = np.where((dy == 0) | ~(ticks >= 0), SCREEN_WIDTH / 2, aimed)
+            self.delay_left[changed] = self.reaction_delay
+
+        waiting = self.delay_left > 0
+        self.delay_left[waiting] -= 1
+        step = np.clip(self.prediction - centre, -self.opponent_speed, self.opponent_speed)
+        self.opponent_x += np.where(waiting, 0, np.round(step).astype(np.int64))
+
+    def step(self):
+        """One tick of Game.runLogic for every rally."""
+        self.player_policy()
+        self.update_ball()
+        self.update_player()
+        self.update_opponent()
+        self.rally_ticks += 1
+        self.ticks += 1
+
+        top = np.round(self.y)
+        player_point = top <= 0
+        opponent_point = ~player_point & (top + BALL_SIZE >= SCREEN_HEIGHT)
+        ended = np.flatnonzero(player_point | opponent_point)
+        if len(ended):
+            self.rally_lengths.append(self.rally_ticks[ended].copy())
+            self.player_points += int(player_point.sum())
+            self.opponent_points += int(opponent_point.sum())
+            self.serve(ended)
+
+    def stats(self):
+        lengths = np.concatenate(self.rally_lengths) if self.rally_lengths else np.zeros(0, dtype=np.int64)
+        rallies = len(lengths)
+        return {
+            'rallies': rallies,
+            'player_win_rate': self.player_points / rallies if rallies else 0,
+            'mean_rally_ticks': float(lengths.mean()) if rallies else 0,
+            'median_rally_ticks': float(np.median(lengths)) if rallies else 0,
+            'p90_rally_ticks': float(np.percentile(lengths, 90)) if rallies else 0,
+        }
+
+def simulate(difficulty, balls, ticks, predictive=False, player_error=PLAYER_ERROR, seed=0):
+    """Run balls rallies for ticks ticks and return their stats with the simulation speed."""
+    batch = BatchRally(balls, difficulty, predictive, player_error, seed)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        batch.step()
+    elapsed = time.perf_counter() - start
+    report = batch.stats()
+    report['elapsed'] = elapsed
+    report['rally_ticks_per_second'] = balls * ticks / elapsed if elapsed else 0
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate PingPong rallies per difficulty.")
+    parser.add_argument('--balls', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=3600)
+    parser.add_argument('--difficulty', choices=sorted(DIFFICULTIES), action='append',
+                        help="Difficulty to simulate, repeatable (default: all)")
+    parser.add_argument('--predictive', action='store_true', help="Use the predictive opponent")
+    parser.add_argument('--player-error', type=float, default=PLAYER_ERROR)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for name in args.difficulty or ['easy', 'medium', 'hard']:
+        print(f"[{name}]")
+        report = simulate(DIFFICULTIES[name], args.balls, args.ticks, args.predictive, args.player_error, args.seed)
+        for key, value in report.items():
+            print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
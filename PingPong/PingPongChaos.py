@@ -0,0 +1,232 @@
+import argparse
+import time
+
+import numpy as np
+import pygame
+
+from PingPong import (Player, Opponent, SilentSound, RateLimitedSound, resource_path, SCREEN_WIDTH, SCREEN_HEIGHT,
+                      FPS, WHITE, BLUE, ORANGE, DIFFICULTY_SETTINGS, MEDIUM)
+
+# Chaos mode: hundreds to thousands of balls bouncing off the walls, the paddles and
+# each other. Ball state lives in NumPy arrays; ball-ball contacts are found through a
+# uniform grid rebuilt every tick, so each ball is only tested against its neighbours.
+BALL_COUNT = 2000
+BALL_SIZE = 12
+RADIUS = BALL_SIZE / 2  # Balls collide with each other as circles
+CELL_SIZE = BALL_SIZE  # Grid cells as wide as a ball, so touching balls are in neighbouring cells
+GRID_COLUMNS = SCREEN_WIDTH // CELL_SIZE + 1
+GRID_ROWS = SCREEN_HEIGHT // CELL_SIZE + 1
+# Each pair of neighbouring cells is visited once: the cell itself, right, and the row below
+NEIGHBOUR_OFFSETS = [(0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+MAX_SPEED = 8
+SPAWN_TOP = SCREEN_HEIGHT // 4
+SPAWN_BOTTOM = SCREEN_HEIGHT * 3 // 4
+PLAYER_SPEED = 5  # Same as holding an arrow key
+
+class BallField:
+    def __init__(self, count, seed=None):
+        """count balls as position and velocity arrays, (x, y) being each ball's top-left corner."""
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.dx = np.zeros(count)
+        self.dy = np.zeros(count)
+        self.spawn(np.arange(count))
+        self.contacts = 0  # Ball-ball contacts resolved in the last tick
+
+    def spawn(self, index):
+        """Drop balls at random in the middle of the court, heading up or down."""
+        self.x[index] = self.rng.uniform(0, SCREEN_WIDTH - BALL_SIZE, size=len(index))
+        self.y[index] = self.rng.uniform(SPAWN_TOP, SPAWN_BOTTOM, size=len(index))
+        self.dx[index] = self.rng.uniform(-3, 3, size=len(index))
+        self.dy[index] = self.rng.choice([-1, 1], size=len(index)) * self.rng.uniform(3, 5, size=len(index))
+
+    def candidate_pairs(self):
+        """Return (i, j) arrays of balls in the same or neighbouring grid cells."""
+        columns = np.clip((self.x // CELL_SIZE).astype(np.int64), 0, GRID_COLUMNS - 1)
+        rows = np.clip((self.y // CELL_SIZE).astype(np.int64), 0, GRID_ROWS - 1)
+        keys = rows * GRID_COLUMNS + columns
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        cells = np.arange(GRID_COLUMNS * GRID_ROWS)
+        cell_start = np.searchsorted(sorted_keys, cells)
+        cell_end = np.searchsorted(sorted_keys, cells, side='right')
+        most_per_cell = int((cell_end - cell_start).max())
+        position = np.empty(self.count, dtype=np.int64)
+        position[order] = np.arange(self.count)
+
+        firsts, seconds = [], []
+        for column_offset, row_offset in NEIGHBOUR_OFFSETS:
+            neighbour_columns = columns + column_offset
+            neighbour_rows = rows + row_offset
+            inside = ((neighbour_columns >= 0) & (neighbour_columns < GRID_COLUMNS)
+                      & (neighbour_rows < GRID_ROWS))
+            balls = np.flatnonzero(inside)
+            neighbour = neighbour_rows[balls] * GRID_COLUMNS + neighbour_columns[balls]
+            start, end = cell_start[neighbour], cell_end[neighbour]
+            if (column_offset, row_offset) == (0, 0):
+                start = position[balls] + 1  # Only the balls after this one in its own cell
+            for k in range(most_per_cell):
+                slot = start + k
+                found = slot < end
+                firsts.append(balls[found])
+                seconds.append(order[slot[found]])
+        return np.concatenate(firsts), np.concatenate(seconds)
+
+    def collide_balls(self):
+        """Bounce touching balls that are moving towards each other, as equal-mass circles."""
+        i, j = self.candidate_pairs()
+        nx = self.x[j] - self.x[i]
+        ny = self.y[j] - self.y[i]
+        distance_squared = nx * nx + ny * ny
+        touching = (distance_squared < (2 * RADIUS) ** 2) & (distance_squared > 0)
+        i, j, nx, ny = i[touching], j[touching], nx[touching], ny[touching]
+        distance = np.sqrt(distance_squared[touching])
+        nx /= distance
+        ny /= distance
+        closing = (self.dx[i] - self.dx[j]) * nx + (self.dy[i] - self.dy[j]) * ny
+        approaching = closing > 0
+        i, j, nx, ny = i[approaching], j[approaching], nx[approaching], ny[approaching]
+        closing = closing[approaching]
+        self.contacts = len(i)
+        # Swap the velocity components along the contact normal; a ball in several
+        # contacts this tick gets the sum of them
+        np.add.at(self.dx, i, -closing * nx)
+        np.add.at(self.dy, i, -closing * ny)
+        np.add.at(self.dx, j, closing * nx)
+        np.add.at(self.dy, j, closing * ny)
+
+    def collide_paddle(self, paddle, moving_down, kick):
+        """Bounce the balls overlapping paddle and moving towards it; kick is added to their dx."""
+        rect = paddle.rect
+        hit = ((self.x < rect.right) & (self.x + BALL_SIZE > rect.left)
+               & (self.y < rect.bottom) & (self.y + BALL_SIZE > rect.top)
+               & ((self.dy > 0) if moving_down else (self.dy < 0)))
+        self.y[hit] = rect.top - BALL_SIZE if moving_down else rect.bottom
+        self.dy[hit] *= -1
+        self.dx[hit] += kick if np.isscalar(kick) else kick[hit]
+        return int(hit.sum())
+
+    def update(self, player, opponent):
+        """Move every ball one tick; returns (wall bounces, paddle hits, player points, opponent points)."""
+        self.collide_balls()
+        paddle_hits = self.collide_paddle(player, True, player.dx // 2)
+        paddle_hits += self.collide_paddle(opponent, False, self.rng.choice([-2, 2], size=self.count))
+        np.clip(self.dx, -MAX_SPEED, MAX_SPEED, out=self.dx)
+        np.clip(self.dy, -MAX_SPEED, MAX_SPEED, out=self.dy)
+        self.x += self.dx
+        self.y += self.dy
+
+        # Side walls reflect, the top and bottom edges are goals
+        left = self.x < 0
+        right = self.x > SCREEN_WIDTH - BALL_SIZE
+        self.x[left] = -self.x[left]
+        self.x[right] = 2 * (SCREEN_WIDTH - BALL_SIZE) - self.x[right]
+        self.dx[left | right] *= -1
+        player_points = self.y <= 0
+        opponent_points = self.y + BALL_SIZE >= SCREEN_HEIGHT
+        self.spawn(np.flatnonzero(player_points | opponent_points))
+        return int(left.sum() + right.sum()), paddle_hits, int(player_points.sum()), int(opponent_points.sum())
+
+    def opponent_target(self, opponent):
+        """x of the centre of the closest ball heading for the opponent, or None."""
+        coming = np.flatnonzero(self.dy < 0)
+        if not len(coming):
+            return None
+        closest = coming[np.argmin(self.y[coming])]
+        return self.x[closest] + RADIUS
+
+def move_opponent(opponent, target):
+    """Opponent.update's chase, towards an x instead of a Ball."""
+    if target is None:
+        return
+    if opponent.rect.centerx > target:
+        opponent.rect.x -= opponent.speed
+    elif opponent.rect.centerx < target:
+        opponent.rect.x += opponent.speed
+
+def benchmark(balls, ticks, seed=0):
+    """Step the field headless and return the time per tick."""
+    field = BallField(balls, seed)
+    player = Player(SilentSound())
+    opponent = Opponent(SilentSound())
+    opponent.speed = DIFFICULTY_SETTINGS[MEDIUM]['opponent_speed']
+    contacts = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        field.update(player, opponent)
+        move_opponent(opponent, field.opponent_target(opponent))
+        contacts += field.contacts
+    elapsed = time.perf_counter() - start
+    return {
+        'balls': balls,
+        'ticks': ticks,
+        'ball_contacts': contacts,
+        'elapsed': elapsed,
+        'ms_per_tick': elapsed * 1000 / ticks if ticks else 0,
+    }
+
+def play(balls, seed=None):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Pingpong Game - Chaos")
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(resource_path("assets/TimesNewRoman-Bold.ttf"), 30)
+    # Thousands of balls can bounce in one tick, so each sound plays at most every 50 ms
+    bounceSound = RateLimitedSound(pygame.mixer.Sound(resource_path("assets/bounce.wav")))
+    pingSound = RateLimitedSound(pygame.mixer.Sound(resource_path("assets/ping.wav")))
+    ball_image = pygame.Surface((BALL_SIZE, BALL_SIZE)).convert()
+    ball_image.fill(ORANGE)
+
+    field = BallField(balls, seed)
+    player = Player(pingSound)
+    opponent = Opponent(SilentSound())
+    opponent.speed = DIFFICULTY_SETTINGS[MEDIUM]['opponent_speed']
+    scores = [0, 0]
+
+    done = False
+    while not done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                done = True
+        keys = pygame.key.get_pressed()
+        player.dx = (PLAYER_SPEED if keys[pygame.K_RIGHT] else 0) - (PLAYER_SPEED if keys[pygame.K_LEFT] else 0)
+
+        wall_bounces, paddle_hits, player_points, opponent_points = field.update(player, opponent)
+        player.update(None, False)
+        move_opponent(opponent, field.opponent_target(opponent))
+        scores[0] += player_points
+        scores[1] += opponent_points
+        if wall_bounces:
+            bounceSound.play()
+        if paddle_hits:
+            pingSound.play()
+
+        screen.fill(BLUE)
+        screen.blits([(ball_image, position) for position in zip(field.x.tolist(), field.y.tolist())], False)
+        player.draw(screen)
+        opponent.draw(screen)
+        screen.blit(font.render(str(scores[1]), True, WHITE), (SCREEN_WIDTH - 80, 50))
+        screen.blit(font.render(str(scores[0]), True, WHITE), (50, 50))
+        screen.blit(font.render(f"{clock.get_fps():.0f} FPS", True, WHITE), (SCREEN_WIDTH // 2 - 40, 50))
+        pygame.display.flip()
+        clock.tick(FPS)
+    pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description="PingPong with thousands of balls.")
+    parser.add_argument('--balls', type=int, default=BALL_COUNT)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--benchmark', type=int, default=0, metavar='TICKS', help="Run headless for TICKS ticks")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        report = benchmark(args.balls, args.benchmark, args.seed or 0)
+        for key, value in report.items():
+            print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    else:
+        play(args.balls, args.seed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,447 @@
+import argparse
+import random
+import socket
+import struct
+import time
+import zlib
+
+import pygame
+
+from PingPong import (Ball, Player, SilentSound, serve_ball, resource_path, SCREEN_WIDTH, SCREEN_HEIGHT,
+                      FPS, WHITE, BLUE)
+
+# Two-player PingPong over UDP with rollback. Both peers run the same fixed-tick
+# simulation from a shared seed and only exchange inputs. A peer never waits for the
+# other's input: it predicts it (the last input received is held), and when the real
+# input arrives and differs it restores the snapshot from that tick and simulates
+# forward again. The host plays the bottom paddle and serves, the other peer the top one.
+#
+# Datagrams start with a type byte; ticks are u32.
+PORT = 5005
+INPUT_DELAY = 2  # Local input is applied this many ticks later, hiding part of the latency
+MAX_ROLLBACK = 10  # Ticks a peer may run ahead of the last input it has from the other
+MAX_INPUTS_PER_PACKET = 255  # Every unacknowledged input is resent until acked, to ride out packet loss
+HANDSHAKE_INTERVAL = 0.1  # Seconds between hello/start resends
+CHECKSUM_WINDOW = 4 * FPS  # Confirmed checksums kept to compare with the ones the other peer sends
+TOP_PADDLE_Y = 25  # Same as Opponent
+PADDLE_SPEED = 5  # Same as holding an arrow key in Game.processEvents
+
+# Input bits
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_SERVE = 4
+
+MSG_HELLO = 1  # Joining peer -> host
+MSG_START = 2  # Host -> joining peer: u64 seed
+# MSG_INPUT: u32 first tick, i32 last contiguous tick received from the other (ack), i32 tick
+# and u32 checksum of the sender's latest confirmed state (-1 before the first), u8 count, inputs
+MSG_INPUT = 3
+
+START = struct.Struct('<BQ')
+INPUT = struct.Struct('<BIiiIB')
+MAX_DATAGRAM = 512
+
+class NetMatch:
+    def __init__(self, seed, bounceSound=None):
+        """Deterministic simulation of one match: same seed and inputs give the same state on both peers."""
+        self.rng = random.Random(seed)
+        self.ball = Ball(bounceSound or SilentSound(), self.rng)
+        self.bottom = Player(SilentSound())
+        self.top = Player(SilentSound())
+        self.top.rect.y = TOP_PADDLE_Y
+        self.scores = [0, 0]  # Bottom, top
+        self.serving = True
+        self.tick = 0
+        serve_ball(self.ball, self.bottom)
+
+    def snapshot(self):
+        ball = self.ball
+        return (self.tick, self.serving, tuple(self.scores), ball.x, ball.y, ball.dx, ball.dy,
+                self.bottom.rect.topleft, self.bottom.dx, self.top.rect.topleft, self.top.dx, self.rng.getstate())
+
+    def restore(self, state):
+        (self.tick, self.serving, scores, x, y, self.ball.dx, self.ball.dy,
+         self.bottom.rect.topleft, self.bottom.dx, self.top.rect.topleft, self.top.dx, rng_state) = state
+        self.scores = list(scores)
+        self.ball.set_position(x, y)
+        self.rng.setstate(rng_state)
+
+    def step(self, bottom_input, top_input):
+        """Advance one tick, following Game.runLogic with the opponent replaced by the top player."""
+        for paddle, buttons in ((self.bottom, bottom_input), (self.top, top_input)):
+            paddle.dx = (PADDLE_SPEED if buttons & INPUT_RIGHT else 0) - (PADDLE_SPEED if buttons & INPUT_LEFT else 0)
+
+        if self.serving:
+            self.bottom.update(self.ball, True)
+            self.top.update(self.ball, False)
+            if bottom_input & INPUT_SERVE:
+                self.ball.dx = self.rng.choice([-3, 3])
+                self.ball.dy = -5  # Ball moves upwards after serve
+                self.serving = False
+        else:
+            self.ball.update(self.bottom, self.top)
+            self.bottom.update(self.ball, False)
+            self.top.update(self.ball, False)
+            if self.ball.rect.top <= 0:
+                self.scores[0] += 1
+                serve_ball(self.ball, self.bottom)
+                self.serving = True
+            elif self.ball.rect.bottom >= SCREEN_HEIGHT:
+                self.scores[1] += 1
+                serve_ball(self.ball, self.bottom)
+                self.serving = True
+        self.tick += 1
+
+def state_checksum(state):
+    return zlib.crc32(repr(state).encode())
+
+class LossyLink:
+    def __init__(self, sock, peer=None, delay=0.0, loss=0.0, jitter=0.0, seed=None):
+        """UDP socket to peer that delays every datagram by delay +- jitter seconds and drops loss of them."""
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.peer = peer
+        self.delay = delay
+        self.loss = loss
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.outgoing = []  # (send time, datagram), sent by pump()
+
+    def send(self, data):
+        if self.peer is None or self.rng.random() < self.loss:
+            return
+        if not self.delay and not self.jitter:
+            self.sock.sendto(data, self.peer)
+            return
+        send_at = time.perf_counter() + max(0.0, self.delay + self.rng.uniform(-self.jitter, self.jitter))
+        self.outgoing.append((send_at, data))
+
+    def pump(self):
+        """Send the delayed datagrams that are due."""
+        now = time.perf_counter()
+        due = [data for send_at, data in self.outgoing if send_at <= now]
+        self.outgoing = [(send_at, data) for send_at, data in self.outgoing if send_at > now]
+        for data in due:
+            try:
+                self.sock.sendto(data, self.peer)
+            except OSError:
+                pass  # The peer's port isn't open yet or went away, UDP just loses it
+
+    def receive(self):
+        """Return every datagram waiting on the socket, remembering the sender as the peer."""
+        datagrams = []
+        while True:
+            try:
+                data, address = self.sock.recvfrom(MAX_DATAGRAM)
+            except (BlockingIOError, ConnectionResetError):
+                return datagrams
+            if self.peer is None:
+                self.peer = address
+            if address == self.peer:
+                datagrams.append(data)
+
+class RollbackSession:
+    def __init__(self, match, side, link, input_delay=INPUT_DELAY, silentSound=None):
+        """Drive match for the player on side (0 bottom, 1 top), exchanging inputs over link."""
+        self.match = match
+        self.side = side
+        self.link = link
+        self.input_delay = input_delay
+        self.silentSound = silentSound or SilentSound()
+        # Nobody can press anything for the first input_delay ticks
+        self.local_inputs = {tick: 0 for tick in range(input_delay)}
+        self.remote_inputs = dict(self.local_inputs)
+        self.last_remote = input_delay - 1  # Every remote input up to here has arrived
+        self.remote_acked = input_delay - 1  # The remote has every local input up to here
+        self.used_remote = {}  # Tick -> remote input the simulation used, real or predicted
+        self.snapshots = {}  # Tick -> state before that tick, kept while it can still be rolled back to
+        self.checksums = {}  # Tick -> checksum of the final state before that tick, the last CHECKSUM_WINDOW
+        self.remote_checksums = {}  # Tick -> the other peer's checksum, until ours for that tick is known
+        self.checked = 0
+        self.desyncs = 0
+        self.first_desync = None  # Earliest tick whose state differed between the peers
+        self.rollbacks = 0
+        self.max_rollback = 0
+        self.resimulated = 0
+        self.max_resimulation_time = 0.0
+        self.stalls = 0
+
+    @property
+    def tick(self):
+        return self.match.tick
+
+    def predicted_remote(self, tick):
+        """The remote input for tick, or the last one received if it hasn't arrived."""
+        if tick in self.remote_inputs:
+            return self.remote_inputs[tick]
+        return self.remote_inputs[self.last_remote]
+
+    def simulate(self, tick):
+        self.snapshots[tick] = self.match.snapshot()
+        remote = self.predicted_remote(tick)
+        self.used_remote[tick] = remote
+        local = self.local_inputs.get(tick, 0)
+        self.match.step(*((local, remote) if self.side == 0 else (remote, local)))
+
+    def send_inputs(self):
+        first = self.remote_acked + 1
+        last = min(max(self.local_inputs), first + MAX_INPUTS_PER_PACKET - 1)
+        inputs = bytes(self.local_inputs[tick] for tick in range(first, last + 1))
+        checksum_tick = next(reversed(self.checksums), -1)
+        checksum = self.checksums.get(checksum_tick, 0)
+        self.link.send(INPUT.pack(MSG_INPUT, first, self.last_remote, checksum_tick, checksum, len(inputs)) + inputs)
+
+    def receive_inputs(self):
+        """Store newly arrived remote inputs and return the earliest tick that was mispredicted, or None."""
+        mispredicted = None
+        for data in self.link.receive():
+            if len(data) < INPUT.size or data[0] != MSG_INPUT:
+                continue
+            _, first, acked, checksum_tick, checksum, count = INPUT.unpack_from(data)
+            self.remote_acked = max(self.remote_acked, acked)
+            if checksum_tick >= 0:
+                self.remote_checksums[checksum_tick] = checksum
+            for offset, buttons in enumerate(data[INPUT.size:INPUT.size + count]):
+                tick = first + offset
+                if tick in self.remote_inputs:
+                    continue
+                self.remote_inputs[tick] = buttons
+                if tick in self.used_remote and self.used_remote[tick] != buttons:
+                    mispredicted = tick if mispredicted is None else min(mispredicted, tick)
+        while self.last_remote + 1 in self.remote_inputs:
+            self.last_remote += 1
+        return mispredicted
+
+    def roll_back(self, tick):
+        """Restore the state before tick and simulate back up to the present, without sound."""
+        present = self.match.tick
+        start = time.perf_counter()
+        bounceSound = self.match.ball.bounceSound
+        self.match.ball.bounceSound = self.silentSound
+        self.match.restore(self.snapshots[tick])
+        for resimulated in range(tick, present):
+            self.simulate(resimulated)
+        self.match.ball.bounceSound = bounceSound
+        self.rollbacks += 1
+        self.max_rollback = max(self.max_rollback, present - tick)
+        self.resimulated += present - tick
+        self.max_resimulation_time = max(self.max_resimulation_time, time.perf_counter() - start)
+
+    def forget_confirmed(self):
+        """Checksum and drop the snapshots that every input before them has confirmed, and old inputs."""
+        final = min(self.last_remote + 1, self.match.tick)
+        for tick in [tick for tick in self.snapshots if tick < final]:
+            self.checksums[tick] = state_checksum(self.snapshots.pop(tick))
+            self.used_remote.pop(tick, None)
+            if tick < self.last_remote:
+                self.remote_inputs.pop(tick, None)
+            if tick <= self.remote_acked:
+                self.local_inputs.pop(tick, None)
+        while len(self.checksums) > CHECKSUM_WINDOW:
+            del self.checksums[next(iter(self.checksums))]
+
+    def check_sync(self):
+        """Compare the other peer's checksums with ours for the same ticks, counting the ones that differ."""
+        oldest = next(iter(self.checksums), None)
+        for tick in sorted(self.remote_checksums):
+            if tick in self.checksums:
+                self.checked += 1
+                if self.remote_checksums.pop(tick) != self.checksums[tick]:
+                    self.desyncs += 1
+                    if self.first_desync is None:
+                        self.first_desync = tick
+            elif oldest is not None and tick < oldest:
+                del self.remote_checksums[tick]  # Too old to compare
+        while len(self.remote_checksums) > CHECKSUM_WINDOW:
+            del self.remote_checksums[min(self.remote_checksums)]
+
+    def advance(self, local_buttons):
+        """Run one frame: exchange inputs, roll back if needed and simulate one tick.
+
+        Returns False when this peer is too far ahead of the other and waits instead.
+        """
+        self.link.pump()
+        mispredicted = self.receive_inputs()
+        if mispredicted is not None and mispredicted < self.match.tick:
+            self.roll_back(mispredicted)
+
+        tick = self.match.tick
+        if tick - self.last_remote > MAX_ROLLBACK:
+            self.stalls += 1
+            self.send_inputs()
+            return False
+        self.local_inputs[tick + self.input_delay] = local_buttons
+        self.send_inputs()
+        self.simulate(tick)
+        self.forget_confirmed()
+        self.check_sync()
+        return True
+
+    def stats(self):
+        return {
+            'ticks': self.match.tick,
+            'rollbacks': self.rollbacks,
+            'max_rollback_ticks': self.max_rollback,
+            'resimulated_ticks': self.resimulated,
+            'max_resimulation_ms': self.max_resimulation_time * 1000,
+            'stalls': self.stalls,
+            'checked_ticks': self.checked,
+            'desynced_ticks': self.desyncs,
+        }
+
+def host_handshake(link, seed, timeout=None):
+    """Answer every hello with the seed until the joining peer's first inputs arrive; False on timeout."""
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    while deadline is None or time.perf_counter() < deadline:
+        link.pump()
+        for data in link.receive():
+            if data[:1] == bytes([MSG_HELLO]):
+                link.send(START.pack(MSG_START, seed))
+            elif data[:1] == bytes([MSG_INPUT]):
+                return True  # The inputs in it are resent until acknowledged
+        time.sleep(0.01)
+    return False
+
+def join_handshake(link, timeout=None):
+    """Say hello to the host until it answers with the match seed; returns None on timeout."""
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    next_hello = 0.0
+    while deadline is None or time.perf_counter() < deadline:
+        now = time.perf_counter()
+        if now >= next_hello:
+            link.send(bytes([MSG_HELLO]))
+            next_hello = now + HANDSHAKE_INTERVAL
+        link.pump()
+        for data in link.receive():
+            if len(data) == START.size and data[0] == MSG_START:
+                return START.unpack(data)[1]
+        time.sleep(0.01)
+    return None
+
+def tracking_input(match, side, rng):
+    """Scripted player for loopback tests: follow the ball, serve after a moment."""
+    paddle = match.bottom if side == 0 else match.top
+    buttons = 0
+    if paddle.rect.centerx < match.ball.rect.centerx - 10:
+        buttons |= INPUT_RIGHT
+    elif paddle.rect.centerx > match.ball.rect.centerx + 10:
+        buttons |= INPUT_LEFT
+    if match.serving and side == 0 and rng.random() < 0.05:
+        buttons |= INPUT_SERVE
+    if rng.random() < 0.1:  # Change of mind, so predictions sometimes fail
+        buttons ^= INPUT_LEFT
+    return buttons
+
+def loopback_test(ticks, delay=0.05, loss=0.0, jitter=0.0, seed=0):
+    """Play both peers against each other over localhost UDP in real time; each checks the other's states."""
+    sockets = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(2)]
+    for sock in sockets:
+        sock.bind(('127.0.0.1', 0))
+    addresses = [sock.getsockname() for sock in sockets]
+    links = [LossyLink(sockets[side], addresses[1 - side], delay, loss, jitter, seed + side) for side in range(2)]
+    sessions = [RollbackSession(NetMatch(seed), side, links[side]) for side in range(2)]
+    rngs = [random.Random(seed + 10 + side) for side in range(2)]
+
+    tick_time = 1 / FPS
+    next_tick = time.perf_counter()
+    while min(session.tick for session in sessions) < ticks:
+        for side, session in enumerate(sessions):
+            if session.tick < ticks:
+                session.advance(tracking_input(session.match, side, rngs[side]))
+        next_tick += tick_time
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+    for sock in sockets:
+        sock.close()
+
+    report = {'delay_ms': delay * 1000, 'loss': loss}
+    for side, session in enumerate(sessions):
+        for key, value in session.stats().items():
+            report[f"{('host', 'peer')[side]}_{key}"] = value
+    report['score'] = f"{sessions[0].match.scores[0]}-{sessions[0].match.scores[1]}"
+    return report
+
+def read_buttons(side, keys):
+    buttons = 0
+    if keys[pygame.K_LEFT]:
+        buttons |= INPUT_LEFT
+    if keys[pygame.K_RIGHT]:
+        buttons |= INPUT_RIGHT
+    if keys[pygame.K_SPACE] and side == 0:
+        buttons |= INPUT_SERVE
+    return buttons
+
+def play(side, address, delay, loss, jitter, seed):
+    """Open the game window and play a networked match as the host (side 0) or the joining peer."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    if side == 0:
+        sock.bind(address)
+        link = LossyLink(sock, None, delay, loss, jitter)
+        print(f"Waiting for a player on port {address[1]}...")
+        host_handshake(link, seed)
+    else:
+        link = LossyLink(sock, address, delay, loss, jitter)
+        seed = join_handshake(link, timeout=10)
+        if seed is None:
+            print("No answer from the host")
+            return
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Pingpong Game - Online")
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(resource_path("assets/TimesNewRoman-Bold.ttf"), 30)
+    bounceSound = pygame.mixer.Sound(resource_path("assets/bounce.wav"))
+    match = NetMatch(seed, bounceSound)
+    session = RollbackSession(match, side, link)
+
+    warned = False
+    done = False
+    while not done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                done = True
+        session.advance(read_buttons(side, pygame.key.get_pressed()))
+        if session.first_desync is not None and not warned:
+            print(f"Out of sync with the other player since tick {session.first_desync}")
+            warned = True
+
+        screen.fill(BLUE)
+        match.ball.draw(screen)
+        match.bottom.draw(screen)
+        match.top.draw(screen)
+        for x in range(0, SCREEN_WIDTH, 20):
+            pygame.draw.rect(screen, WHITE, [x, SCREEN_HEIGHT / 2, 10, 10])
+        screen.blit(font.render(str(match.scores[1]), True, WHITE), (SCREEN_WIDTH - 50, 50))
+        screen.blit(font.render(str(match.scores[0]), True, WHITE), (50, 50))
+        pygame.display.flip()
+        clock.tick(FPS)
+    pygame.quit()
+    sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Two-player PingPong over UDP with rollback.")
+    parser.add_argument('mode', choices=['host', 'join', 'loopback'])
+    parser.add_argument('address', nargs='?', default=None, help="HOST:PORT to join")
+    parser.add_argument('--port', type=int, default=PORT, help="Port to host on")
+    parser.add_argument('--delay-ms', type=float, default=0, help="Simulated one-way latency added to every packet")
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--loss', type=float, default=0, help="Fraction of packets to drop")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--ticks', type=int, default=10 * FPS, help="Length of the loopback test")
+    args = parser.parse_args()
+    seed = args.seed if args.seed is not None else random.randrange(1 << 63)
+
+    if args.mode == 'loopback':
+        report = loopback_test(args.ticks, args.delay_ms / 1000, args.loss, args.jitter_ms / 1000, seed)
+        for key, value in report.items():
+            print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    elif args.mode == 'host':
+        play(0, ('0.0.0.0', args.port), args.delay_ms / 1000, args.loss, args.jitter_ms / 1000, seed)
+    else:
+        if args.address is None:
+            parser.error("join needs HOST:PORT")
+        host, port = args.address.rsplit(':', 1)
+        play(1, (host, int(port)), args.delay_ms / 1000, args.loss, args.jitter_ms / 1000, seed)
+
+if __name__ == '__main__':
+    main()
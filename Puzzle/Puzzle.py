@@ -1,5 +1,9 @@
+import time
+
+import numpy as np
 import pygame
-import random
+
+from PuzzleBoard import BoardPool
 
 # Initialize Pygame
 pygame.init()
@@ -19,6 +23,7 @@ WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 TEXT_COLOR = (255, 255, 255)
 BORDER_COLOR = (0, 0, 0)  # Border color for distinguishing blocks
+HINT_COLOR = (0, 255, 255)
 colors = [
     (255, 0, 0),      # Red
     (255, 255, 0),    # Yellow
@@ -28,107 +33,105 @@ colors = [
     (255, 165, 0)     # Orange
 ]
 
-# Block size
-BLOCK_SIZE = 64
-
 # 2D Board dimensions (number of blocks horizontally and vertically)
 BOARD_WIDTH = 8
 BOARD_HEIGHT = 8
 
+# Block size, shrunk so that larger boards still fit below the score display
+BLOCK_SIZE = max(1, min(64, SCREEN_WIDTH // BOARD_WIDTH, (SCREEN_HEIGHT - 100) // BOARD_HEIGHT))
+# Below this size blocks are drawn as one scaled image instead of one rect each
+MIN_BLOCK_RECT_SIZE = 8
+PALETTE = np.array(colors, dtype=np.uint8)
+
+# Seconds per frame spent resolving cascades, the rest carries over to the next frames
+CASCADE_BUDGET = 0.004
+
+# Re-check incremental match results against a full board scan (slow, for debugging)
+VERIFY_MATCHES = False
+
 # Game States
 STATE_MENU = "MENU"
 STATE_PLAYING = "PLAYING"
 STATE_GAME_OVER = "GAME OVER"
 
-# Block Object
-class Block:
-    def __init__(self):
-        self.color = random.choice(colors)
-        self.rect = pygame.Rect(0, 0, BLOCK_SIZE, BLOCK_SIZE)
-
 # Game Object
 class Game:
     def __init__(self):
         self.score = 0
         self.best_score = 0
         self.time_left = 90  # Start with 1 minute 30 seconds (90 seconds)
-        self.board = [[Block() for _ in range(BOARD_WIDTH)] for _ in range(BOARD_HEIGHT)]
+        self.board_pool = BoardPool(BOARD_WIDTH, BOARD_HEIGHT, len(colors))  # Boards generated ahead of time
+        self.board = self.board_pool.pop()
         self.cursor_x = 0
         self.cursor_y = 0
         self.selected = None  # To store the selected block for swapping
+        self.hint = None  # Swap shown after pressing H, as (x1, y1, x2, y2)
+        self.cascade = None  # Cascade still being resolved, advanced by update()
         self.state = STATE_MENU
         self.game_over = False
 
     def create_board(self):
-        """Create board ensuring no initial matches."""
-        for y in range(BOARD_HEIGHT):
-            for x in range(BOARD_WIDTH):
-                while self.is_match(x, y):
-                    self.board[y][x] = Block()
-
-    def is_match(self, x, y):
-        """Check for horizontal and vertical matches."""
-        # Check horizontal match
-        if x > 1 and self.board[y][x].color == self.board[y][x-1].color == self.board[y][x-2].color:
-            return True
-        # Check vertical match
-        if y > 1 and self.board[y][x].color == self.board[y-1][x].color == self.board[y-2][x].color:
-            return True
-        return False
+        """Take a board with no initial matches and at least one move from the pool."""
+        self.board = self.board_pool.pop()
+        self.hint = None
+        self.cascade = None
 
     def swap_blocks(self, x1, y1, x2, y2):
         """Swaps two blocks."""
-        self.board[y1][x1], self.board[y2][x2] = self.board[y2][x2], self.board[y1][x1]
-
-    def find_matches(self):
-        """Find matches of 3 or more and return them as a list."""
-        matched_blocks = []
-        # Horizontal matches
-        for y in range(BOARD_HEIGHT):
-            for x in range(BOARD_WIDTH - 2):
-                if self.board[y][x].color == self.board[y][x+1].color == self.board[y][x+2].color:
-                    matched_blocks += [(x, y), (x+1, y), (x+2, y)]
+        self.board.swap(x1, y1, x2, y2)
 
-        # Vertical matches
-        for x in range(BOARD_WIDTH):
-            for y in range(BOARD_HEIGHT - 2):
-                if self.board[y][x].color == self.board[y+1][x].color == self.board[y+2][x].color:
-                    matched_blocks += [(x, y), (x, y+1), (x, y+2)]
-
-        return set(matched_blocks)
+    def find_matches(self, rows=None, cols=None):
+        """Return a mask of the blocks in matches of 3 or more, scanning only rows and cols if given."""
+        return self.board.find_matches(rows, cols)
 
     def remove_matches(self, matches):
-        """Remove matched blocks and fill in new blocks."""
-        for x, y in matches:
-            self.board[y][x] = None  # Remove block by setting it to None
-
-        # Shift down the blocks and fill in new ones
-        for x in range(BOARD_WIDTH):
-            column = [self.board[y][x] for y in range(BOARD_HEIGHT) if self.board[y][x] is not None]
-            missing = BOARD_HEIGHT - len(column)
-            new_blocks = [Block() for _ in range(missing)]
-            column = new_blocks + column
-
-            for y in range(BOARD_HEIGHT):
-                self.board[y][x] = column[y]
+        """Remove matched blocks, fill in new blocks and return the (rows, cols) that changed."""
+        changed = self.board.remove_matches(matches)
+        count = int(matches.sum())
 
         # Update score
-        self.score += len(matches) * 10
+        self.score += count * 10
         # Increase time left by 0.1 second for each matching block
-        self.time_left += len(matches) * 0.1
+        self.time_left += count * 0.1
+        return changed
 
-    def resolve_board(self):
-        """Resolve the board until no more matches exist."""
-        while True:
+    def cascade_steps(self, matches=None):
+        """Resolve the board one cascade step per iteration, re-checking only the lines that changed.
+
+        Score and time are credited as each step is removed, and the board is complete
+        and drawable whenever the generator is suspended.
+        """
+        if matches is None:
             matches = self.find_matches()
-            if matches:
-                self.remove_matches(matches)
-            else:
+        while matches.any():
+            rows, cols = self.remove_matches(matches)
+            matches = self.board.cascade_matches(rows, cols, VERIFY_MATCHES)
+            yield
+
+        # Shuffle a board that has no moves left
+        if not self.board.moves:
+            self.board.reshuffle()
+
+    def resolve_board(self, matches=None):
+        """Resolve the board until no more matches exist."""
+        for _ in self.cascade_steps(matches):
+            pass
+
+    def advance_cascade(self, budget=CASCADE_BUDGET):
+        """Run cascade steps until the cascade ends or budget seconds have passed, at least one step."""
+        deadline = time.perf_counter() + budget
+        while self.cascade is not None:
+            try:
+                next(self.cascade)
+            except StopIteration:
+                self.cascade = None
+            if time.perf_counter() >= deadline:
                 break
 
     def update(self):
         """Main game logic, including time decrement."""
         if self.state == STATE_PLAYING:
+            self.advance_cascade()
             if self.time_left > 0:
                 self.time_left -= 1 / FPS  # Decrease time by the frame rate
             else:
@@ -153,19 +156,32 @@ class Game:
             screen.blit(start_text, (SCREEN_WIDTH // 2 - start_text.get_width() // 2, SCREEN_HEIGHT // 2))
 
         elif self.state == STATE_PLAYING:
-            # Draw the blocks and the borders around them
-            for y in range(BOARD_HEIGHT):
-                for x in range(BOARD_WIDTH):
-                    block = self.board[y][x]
-                    block.rect.topleft = (x * BLOCK_SIZE, y * BLOCK_SIZE + 100)  # Offset for score display
-                    pygame.draw.rect(screen, block.color, block.rect)
-
-                    # Draw the regular border
-                    pygame.draw.rect(screen, BORDER_COLOR, block.rect, 2)
-
-                    # If block is selected, highlight it with a bold white border
-                    if self.selected == (x, y):
-                        pygame.draw.rect(screen, WHITE, block.rect, 5)  # Draw a thicker white border
+            if BLOCK_SIZE < MIN_BLOCK_RECT_SIZE:
+                # Too small for borders: colour the whole board as one image and scale it up
+                image = pygame.surfarray.make_surface(PALETTE[self.board.cells].transpose(1, 0, 2))
+                screen.blit(pygame.transform.scale(image, (BOARD_WIDTH * BLOCK_SIZE, BOARD_HEIGHT * BLOCK_SIZE)), (0, 100))
+            else:
+                # Draw the blocks and the borders around them
+                cells = self.board.cells.tolist()
+                for y in range(BOARD_HEIGHT):
+                    for x in range(BOARD_WIDTH):
+                        rect = pygame.Rect(x * BLOCK_SIZE, y * BLOCK_SIZE + 100, BLOCK_SIZE, BLOCK_SIZE)  # Offset for score display
+                        pygame.draw.rect(screen, colors[cells[y][x]], rect)
+
+                        # Draw the regular border
+                        pygame.draw.rect(screen, BORDER_COLOR, rect, 2)
+
+            # If a block is selected, highlight it with a bold white border
+            if self.selected is not None:
+                x, y = self.selected
+                pygame.draw.rect(screen, WHITE, (x * BLOCK_SIZE, y * BLOCK_SIZE + 100, BLOCK_SIZE, BLOCK_SIZE), 5)
+
+            # Outline both blocks of the hinted swap
+            if self.hint is not None:
+                x1, y1, x2, y2 = self.hint
+                hint_rect = pygame.Rect(x1 * BLOCK_SIZE, y1 * BLOCK_SIZE + 100,
+                                        (x2 - x1 + 1) * BLOCK_SIZE, (y2 - y1 + 1) * BLOCK_SIZE)
+                pygame.draw.rect(screen, HINT_COLOR, hint_rect, 3)
 
             # Draw the cursor (the current position of the player)
             pygame.draw.rect(screen, WHITE, (self.cursor_x * BLOCK_SIZE, self.cursor_y * BLOCK_SIZE + 100, BLOCK_SIZE, BLOCK_SIZE), 3)
@@ -213,21 +229,30 @@ class Game:
                     self.cursor_y -= 1
                 elif event.key == pygame.K_DOWN and self.cursor_y < BOARD_HEIGHT - 1:
                     self.cursor_y += 1
+                elif self.cascade is not None:
+                    pass  # No swaps or hints until the board has settled
+                elif event.key == pygame.K_h:
+                    self.hint = self.board.random_move()  # Show a swap that makes a match
                 elif event.key == pygame.K_SPACE:
                     if self.selected is None:
                         self.selected = (self.cursor_x, self.cursor_y)  # Select the first block
                     else:
-                        # Try swapping blocks
-                        self.swap_blocks(self.selected[0], self.selected[1], self.cursor_x, self.cursor_y)
-                        
-                        # Check for matches after swapping
-                        matches = self.find_matches()
-                        if matches:
-                            self.resolve_board()  # Resolve board if there are matches
+                        x1, y1 = self.selected
+                        if abs(x1 - self.cursor_x) + abs(y1 - self.cursor_y) == 1 and not self.board.is_legal(x1, y1, self.cursor_x, self.cursor_y):
+                            pass  # The move index already knows this neighbouring swap makes no match
                         else:
-                            # No match, so revert the swap
-                            self.swap_blocks(self.selected[0], self.selected[1], self.cursor_x, self.cursor_y)
-                        
+                            # Try swapping blocks
+                            self.swap_blocks(x1, y1, self.cursor_x, self.cursor_y)
+
+                            # Check for matches after swapping, only the swapped rows and columns can have new ones
+                            matches = self.find_matches({y1, self.cursor_y}, {x1, self.cursor_x})
+                            if matches.any():
+                                self.cascade = self.cascade_steps(matches)  # Resolve board over the next frames
+                                self.hint = None
+                            else:
+                                # No match, so revert the swap
+                                self.swap_blocks(self.selected[0], self.selected[1], self.cursor_x, self.cursor_y)
+
                         self.selected = None  # Deselect the block
 
         elif self.state == STATE_GAME_OVER:
@@ -0,0 +1,389 @@
+import argparse
+import queue
+import threading
+import time
+
+import numpy as np
+
+# Pygame-free match-3 board: one int8 colour index per cell, stored row-major as
+# cells[y, x]. Matching, gravity and refill work on whole rows and columns at once,
+# so boards far larger than the 8x8 game board stay cheap.
+COLOR_COUNT = 6
+# The cells sit inside a border of EMPTY cells wide enough for every swap check to read
+# past the edge without bounds tests. EMPTY never equals a colour.
+EMPTY = -1
+PADDING = 3
+RIGHT = (0, 1)  # Swap directions as (dy, dx) from the top-left cell of the swap
+DOWN = (1, 0)
+PLANT_ATTEMPTS = 100  # Places to try for the guaranteed move before falling back to reshuffling
+RESHUFFLE_ATTEMPTS = 100  # Shuffles, then new boards, to try on a dead board
+POOL_SIZE = 4
+
+class PuzzleBoard:
+    def __init__(self, width, height, color_count=COLOR_COUNT, seed=None, cells=None):
+        """A new board of width x height, or a copy of cells if given; seed drives generation and refills."""
+        self.width = width
+        self.height = height
+        self.color_count = color_count
+        self.rng = np.random.default_rng(seed)
+        self.padded = np.full((height + 2 * PADDING, width + 2 * PADDING), EMPTY, dtype=np.int8)
+        self.cells = self.padded[PADDING:-PADDING, PADDING:-PADDING]  # View, always update in place
+        # Legal-move index: which adjacent swaps make a match, updated with the board. The
+        # moves are also kept in a list for O(1) random picks and a dict of list positions
+        # for O(1) removal; those catch up with the arrays only when asked for, so a cascade
+        # pays for its net change in moves once instead of once per step.
+        self.legal = {RIGHT: np.zeros((height, width - 1), dtype=bool),
+                      DOWN: np.zeros((height - 1, width), dtype=bool)}
+        self.listed = {direction: legal.copy() for direction, legal in self.legal.items()}
+        self.unlisted = {}  # Direction -> (y0, y1, x0, x1) box that changed since the last sync
+        self.move_list = []
+        self.move_slots = {}
+        if cells is None:
+            self.fill()
+        else:
+            self.cells[:] = cells
+            self.index_moves()
+
+    def random_cells(self, size):
+        return self.rng.integers(self.color_count, size=size, dtype=np.int8)
+
+    def reroll_matches(self):
+        """Re-roll matched cells until nothing matches."""
+        matches = self.find_matches()
+        while matches.any():
+            self.cells[matches] = self.random_cells(int(matches.sum()))
+            matches = self.find_matches()
+
+    def fill(self):
+        """Fill the board with a layout that has no matches and at least one move."""
+        self.generate()
+        self.plant()
+        if not self.moves:
+            self.reshuffle()
+
+    def generate(self):
+        """Colour the board so that no cell completes a run with the cells already coloured.
+
+        Each cell depends only on the two cells to its left and above, so the board is
+        coloured one anti-diagonal at a time, every cell of a diagonal at once.
+        """
+        colors = self.color_count  # Stands for "no forbidden colour"
+        self.cells[:] = EMPTY
+        padded = self.padded
+        for diagonal in range(self.height + self.width - 1):
+            ys = np.arange(max(0, diagonal - self.width + 1), min(self.height - 1, diagonal) + 1) + PADDING
+            xs = diagonal + 2 * PADDING - ys
+
+            # A colour is forbidden if the two cells before this one in a row or column share it
+            left = padded[ys, xs - 1]
+            left = np.where((left == padded[ys, xs - 2]) & (left != EMPTY), left, colors)
+            up = padded[ys - 1, xs]
+            up = np.where((up == padded[ys - 2, xs]) & (up != EMPTY), up, colors)
+            low = np.minimum(left, up)
+            high = np.where(left == up, colors, np.maximum(left, up))
+
+            # Pick among the allowed colours, then step over the forbidden ones in order
+            allowed = colors - (low < colors) - (high < colors)
+            values = (self.rng.random(len(ys)) * allowed).astype(np.int8)
+            values += values >= low
+            values += values >= high
+            padded[ys, xs] = values
+
+    def plant_move(self):
+        """Recolour two cells into a "c c x c" line so the board has a move; False if that would match."""
+        dy, dx = (RIGHT, DOWN)[self.rng.integers(2)]
+        if self.height <= 3 * dy or self.width <= 3 * dx:
+            return False
+        y = int(self.rng.integers(self.height - 3 * dy))
+        x = int(self.rng.integers(self.width - 3 * dx))
+        color = self.cells[y, x]
+        if self.cells[y + 2 * dy, x + 2 * dx] == color:
+            return False
+        planted = [(y + dy, x + dx), (y + 3 * dy, x + 3 * dx)]
+        previous = [self.cells[cell] for cell in planted]
+        for cell in planted:
+            self.cells[cell] = color
+        rows, cols = zip(*planted)
+        if self.find_matches(rows, cols).any():
+            for cell, value in zip(planted, previous):
+                self.cells[cell] = value
+            return False
+        return True
+
+    def plant(self):
+        """Try PLANT_ATTEMPTS places for plant_move, then index the board's moves."""
+        for _ in range(PLANT_ATTEMPTS):
+            if self.plant_move():
+                break
+        self.index_moves()
+
+    def reshuffle(self):
+        """Shuffle the cells of a dead board until it has a move and no matches.
+
+        Raises ValueError if neither shuffling nor newly generated boards find a move,
+        as on boards too small or narrow for any swap to make a match.
+        """
+        for _ in range(RESHUFFLE_ATTEMPTS):
+            values = self.cells.flatten()
+            self.rng.shuffle(values)
+            self.cells[:] = values.reshape(self.cells.shape)
+            self.reroll_matches()
+            self.index_moves()
+            if self.moves:
+                return
+        for _ in range(RESHUFFLE_ATTEMPTS):
+            self.generate()
+            self.plant()
+            if self.moves:
+                return
+        raise ValueError(f"no legal move found for a {self.width}x{self.height} board")
+
+    def swap(self, x1, y1, x2, y2):
+        """Swap two cells."""
+        self.cells[y1, x1], self.cells[y2, x2] = self.cells[y2, x2], self.cells[y1, x1]
+        self.update_moves((y1, y2), (x1, x2))
+
+    def swap_legality(self, direction, y0, y1, x0, x1):
+        """Return which swaps in direction starting at rows y0:y1 and cols x0:x1 would make a match."""
+        dy, dx = direction
+
+        def window(oy, ox):
+            return self.padded[PADDING + y0 + oy:PADDING + y1 + oy, PADDING + x0 + ox:PADDING + x1 + ox]
+
+        def lands_in_run(value, oy, ox, away):
+            """Whether value placed at offset (oy, ox) completes a run, not counting the cell it came from."""
+            def same(steps, uy, ux):
+                return window(oy + steps * uy, ox + steps * ux) == value
+            ay, ax = away
+            ey, ex = dx, dy  # Perpendicular to the swap
+            return ((same(1, ay, ax) & same(2, ay, ax))
+                    | (same(-1, ey, ex) & (same(-2, ey, ex) | same(1, ey, ex)))
+                    | (same(1, ey, ex) & same(2, ey, ex)))
+
+        first = window(0, 0)
+        second = window(dy, dx)
+        return (first != second) & (lands_in_run(second, 0, 0, (-dy, -dx)) | lands_in_run(first, dy, dx, (dy, dx)))
+
+    def index_moves(self):
+        """Rebuild the legal-move index from scratch."""
+        for legal in self.legal.values():
+            legal[:] = False
+        self.update_moves((0, self.height - 1), (0, self.width - 1))
+
+    def update_moves(self, rows, cols):
+        """Re-check the swaps that can see a cell in the given rows and cols."""
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        if not rows.size or not cols.size:
+            return
+        # A swap's check reads up to 2 cells before its first cell and 3 after it
+        y0 = max(0, int(rows.min()) - PADDING)
+        x0 = max(0, int(cols.min()) - PADDING)
+        for direction, legal in self.legal.items():
+            y1 = min(legal.shape[0], int(rows.max()) + PADDING)
+            x1 = min(legal.shape[1], int(cols.max()) + PADDING)
+            if y0 >= y1 or x0 >= x1:
+                continue
+            legal[y0:y1, x0:x1] = self.swap_legality(direction, y0, y1, x0, x1)
+            if direction in self.unlisted:
+                by0, by1, bx0, bx1 = self.unlisted[direction]
+                self.unlisted[direction] = (min(y0, by0), max(y1, by1), min(x0, bx0), max(x1, bx1))
+            else:
+                self.unlisted[direction] = (y0, y1, x0, x1)
+
+    @property
+    def moves(self):
+        """The legal swaps as a list of (x1, y1, x2, y2), (x1, y1) being the top-left cell."""
+        for direction, (y0, y1, x0, x1) in self.unlisted.items():
+            now = self.legal[direction][y0:y1, x0:x1]
+            before = self.listed[direction][y0:y1, x0:x1]
+            dy, dx = direction
+            for y, x in zip(*np.nonzero(before & ~now)):
+                x, y = x0 + int(x), y0 + int(y)
+                self.remove_move((x, y, x + dx, y + dy))
+            for y, x in zip(*np.nonzero(now & ~before)):
+                x, y = x0 + int(x), y0 + int(y)
+                self.add_move((x, y, x + dx, y + dy))
+            before[:] = now
+        self.unlisted.clear()
+        return self.move_list
+
+    def add_move(self, move):
+        self.move_slots[move] = len(self.move_list)
+        self.move_list.append(move)
+
+    def remove_move(self, move):
+        # Move the last move into the freed slot so removal stays O(1)
+        slot = self.move_slots.pop(move)
+        last = self.move_list.pop()
+        if last != move:
+            self.move_list[slot] = last
+            self.move_slots[last] = slot
+
+    def is_legal(self, x1, y1, x2, y2):
+        """Whether swapping two cells makes a match, from the index."""
+        if (x1, y1) > (x2, y2):
+            x1, y1, x2, y2 = x2, y2, x1, y1
+        direction = (y2 - y1, x2 - x1)
+        return direction in self.legal and bool(self.legal[direction][y1, x1])
+
+    def random_move(self):
+        """Return a random legal swap as (x1, y1, x2, y2), or None on a dead board."""
+        moves = self.moves
+        return moves[self.rng.integers(len(moves))] if moves else None
+
+    def find_matches(self, rows=None, cols=None):
+        """Return a boolean (height, width) mask of the cells in runs of 3 or more.
+
+        rows and cols limit the horizontal and vertical scans to the lines that changed;
+        leaving both out scans the whole board.
+        """
+        if rows is None and cols is None:
+            rows = cols = slice(None)
+        else:
+            rows = np.unique(np.fromiter(rows if rows is not None else (), dtype=np.intp))
+            cols = np.unique(np.fromiter(cols if cols is not None else (), dtype=np.intp))
+        matches = np.zeros(self.cells.shape, dtype=bool)
+
+        # Horizontal runs: a cell starting three equal cells marks itself and its two neighbours
+        lines = self.cells[rows]
+        run = (lines[:, :-2] == lines[:, 1:-1]) & (lines[:, 1:-1] == lines[:, 2:])
+        hits = np.zeros(lines.shape, dtype=bool)
+        hits[:, :-2] |= run
+        hits[:, 1:-1] |= run
+        hits[:, 2:] |= run
+        matches[rows] |= hits
+
+        # Vertical runs
+        lines = self.cells[:, cols]
+        run = (lines[:-2] == lines[1:-1]) & (lines[1:-1] == lines[2:])
+        hits = np.zeros(lines.shape, dtype=bool)
+        hits[:-2] |= run
+        hits[1:-1] |= run
+        hits[2:] |= run
+        matches[:, cols] |= hits
+        return matches
+
+    def remove_matches(self, matches):
+        """Drop the cells above matched ones into place and refill the top of each column.
+
+        Returns the (rows, cols) that changed, which is where the next matches can appear.
+        """
+        cols = np.flatnonzero(matches.any(axis=0))
+        if not len(cols):
+            return np.arange(0), cols
+        removed = matches[:, cols]
+        # Everything above the lowest removed cell of a column moved or was refilled
+        top = int((self.height - np.argmax(removed[::-1], axis=0)).max())
+        removed = removed[:top]
+
+        # A stable sort puts the removed cells on top and keeps the survivors in order
+        order = np.argsort(~removed, axis=0, kind='stable')
+        columns = np.take_along_axis(self.cells[:top, cols], order, axis=0)
+        fresh = np.arange(top)[:, None] < removed.sum(axis=0)
+        columns[fresh] = self.random_cells(int(fresh.sum()))
+        self.cells[:top, cols] = columns
+        self.update_moves((0, top - 1), cols)
+        return np.arange(top), cols
+
+    def cascade_matches(self, rows, cols, verify=False):
+        """Return the matches after a cascade step changed rows and cols.
+
+        verify also scans the whole board and uses that result if the two differ; it is
+        slow and meant for checking the incremental scan.
+        """
+        matches = self.find_matches(rows, cols)
+        if verify:
+            full = self.find_matches()
+            if not np.array_equal(full, matches):
+                matches = full
+        return matches
+
+    def resolve(self, matches=None, verify=False):
+        """Remove matches until the board is stable and return the number of cells cleared."""
+        if matches is None:
+            matches = self.find_matches()
+        cleared = 0
+        while matches.any():
+            cleared += int(matches.sum())
+            rows, cols = self.remove_matches(matches)
+            matches = self.cascade_matches(rows, cols, verify)
+        return cleared
+
+class BoardPool:
+    def __init__(self, width, height, color_count=COLOR_COUNT, size=POOL_SIZE, seed=None):
+        """Keep size boards generated ahead on a background thread, seeded seed, seed + 1, ..."""
+        self.width = width
+        self.height = height
+        self.color_count = color_count
+        self.next_seed = seed if seed is not None else int(np.random.default_rng().integers(1 << 32))
+        self.seed_lock = threading.Lock()
+        self.boards = queue.Queue(maxsize=size)
+        self.thread = threading.Thread(target=self.fill_pool, daemon=True)
+        self.thread.start()
+
+    def take_seed(self):
+        with self.seed_lock:
+            seed = self.next_seed
+            self.next_seed += 1
+        return seed
+
+    def make_board(self):
+        return PuzzleBoard(self.width, self.height, self.color_count, self.take_seed())
+
+    def fill_pool(self):
+        while True:
+            self.boards.put(self.make_board())  # Blocks while the pool is full
+
+    def pop(self):
+        """Return a ready board, generating one on the spot only if the pool ran dry."""
+        try:
+            return self.boards.get_nowait()
+        except queue.Empty:
+            return self.make_board()
+
+def benchmark(width, height, swaps, seed=0, verify=False):
+    """Try random adjacent swaps on a width x height board, resolving the ones that match.
+
+    verify re-checks every cascade step against a full board scan.
+    """
+    board = PuzzleBoard(width, height, seed=seed)
+    rng = np.random.default_rng(seed)
+    cleared = 0
+    matched = 0
+    start = time.perf_counter()
+    for _ in range(swaps):
+        x = int(rng.integers(width - 1))
+        y = int(rng.integers(height))
+        board.swap(x, y, x + 1, y)
+        matches = board.find_matches((y,), (x, x + 1))
+        if matches.any():
+            matched += 1
+            cleared += board.resolve(matches, verify)
+        else:
+            board.swap(x, y, x + 1, y)
+    elapsed = time.perf_counter() - start
+    return {
+        'board': f"{width}x{height}",
+        'swaps': swaps,
+        'matching_swaps': matched,
+        'cells_cleared': cleared,
+        'elapsed': elapsed,
+        'swaps_per_second': swaps / elapsed if elapsed else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the array-backed Puzzle board.")
+    parser.add_argument('--width', type=int, default=512)
+    parser.add_argument('--height', type=int, default=512)
+    parser.add_argument('--swaps', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verify', action='store_true', help="Check each cascade step against a full board scan")
+    args = parser.parse_args()
+
+    report = benchmark(args.width, args.height, args.swaps, args.seed, args.verify)
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import hashlib
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from PuzzleBoard import PuzzleBoard, COLOR_COUNT
+
+# Monte-Carlo swap picker: every candidate swap is scored by the mean of random
+# playouts that start with it, played by the board's own swap/find/remove rules.
+POINTS_PER_BLOCK = 10  # Same as Game.remove_matches
+ROLLOUTS = 32  # Playouts per candidate swap
+DEPTH = 8  # Swaps per playout, the candidate included
+MAX_CANDIDATES = 64  # Larger boards only score a seeded sample of their legal swaps
+CACHE_SIZE = 10000  # Maximum number of cached board evaluations
+PAR_MOVES = 60  # Swaps in a 90 second run, at about one swap every 1.5 seconds
+
+def board_hash(board):
+    """Key a board by its size, colour count and cells."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array([board.width, board.height, board.color_count], dtype=np.int64).tobytes())
+    digest.update(board.cells.tobytes())
+    return digest.digest()
+
+def play_move(board, move):
+    """Swap and resolve move on board, returning the points it scored (0 if it made no match)."""
+    x1, y1, x2, y2 = move
+    board.swap(x1, y1, x2, y2)
+    matches = board.find_matches((y1, y2), (x1, x2))
+    if not matches.any():
+        board.swap(x1, y1, x2, y2)
+        return 0
+    points = board.resolve(matches) * POINTS_PER_BLOCK
+    if not board.moves:  # The game shuffles dead boards too
+        board.reshuffle()
+    return points
+
+def rollout(board, move, depth):
+    """Play move and then depth - 1 random legal swaps, returning the points scored."""
+    points = play_move(board, move)
+    for _ in range(depth - 1):
+        points += play_move(board, board.random_move())
+    return points
+
+def rollout_scores(cells, color_count, move, seeds, depth):
+    """Process pool entry point: one playout per seed from a copy of cells, seeding its refills."""
+    height, width = cells.shape
+    return [rollout(PuzzleBoard(width, height, color_count, seed, cells), move, depth) for seed in seeds]
+
+class MonteCarloSolver:
+    def __init__(self, rollouts=ROLLOUTS, depth=DEPTH, workers=None, seed=0, max_candidates=MAX_CANDIDATES):
+        """workers > 1 spreads the candidates' playouts over processes."""
+        self.rollouts = rollouts
+        self.depth = depth
+        self.seed = seed
+        self.max_candidates = max_candidates
+        self.cache = OrderedDict()
+        self.played = 0  # Playouts run so far
+        self.pool = ProcessPoolExecutor(workers) if workers and workers > 1 else None
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def candidates(self, board, key):
+        moves = sorted(board.moves)
+        if len(moves) <= self.max_candidates:
+            return moves
+        rng = np.random.default_rng(int.from_bytes(key[:8], 'little'))
+        return [moves[index] for index in rng.choice(len(moves), self.max_candidates, replace=False)]
+
+    def evaluate(self, board):
+        """Return {move: mean playout points} for the board's candidate swaps."""
+        key = board_hash(board)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        # Every candidate gets the same refill seeds, so they're compared under the same luck
+        seeds = range(self.seed, self.seed + self.rollouts)
+        cells = board.cells.copy()
+        moves = self.candidates(board, key)
+        if self.pool:
+            futures = [self.pool.submit(rollout_scores, cells, board.color_count, move, seeds, self.depth)
+                       for move in moves]
+            scores = [future.result() for future in futures]
+        else:
+            scores = [rollout_scores(cells, board.color_count, move, seeds, self.depth) for move in moves]
+        self.played += len(moves) * self.rollouts
+
+        estimates = {move: sum(points) / len(points) for move, points in zip(moves, scores)}
+        self.cache[key] = estimates
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return estimates
+
+    def best_move(self, board):
+        """Return the (x1, y1, x2, y2) swap with the best expected points, or None on a dead board."""
+        estimates = self.evaluate(board)
+        return max(estimates, key=estimates.get) if estimates else None
+
+    def par_score(self, width, height, seed, moves=PAR_MOVES, color_count=COLOR_COUNT):
+        """Score of a run of moves swaps on a seeded board, each picked by the solver."""
+        board = PuzzleBoard(width, height, color_count, seed)
+        points = 0
+        for _ in range(moves):
+            points += play_move(board, self.best_move(board))
+        return points
+
+def benchmark(runs, width, height, rollouts=ROLLOUTS, depth=DEPTH, workers=None, seed=0):
+    """Compute par scores for runs seeded boards and return the stats."""
+    start = time.perf_counter()
+    with MonteCarloSolver(rollouts, depth, workers, seed) as solver:
+        pars = [solver.par_score(width, height, seed + run) for run in range(runs)]
+        played = solver.played
+    elapsed = time.perf_counter() - start
+    return {
+        'runs': runs,
+        'mean_par': sum(pars) / runs if runs else 0,
+        'min_par': min(pars, default=0),
+        'max_par': max(pars, default=0),
+        'rollouts': played,
+        'elapsed': elapsed,
+        'rollouts_per_second': played / elapsed if elapsed else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute Monte-Carlo par scores for Puzzle boards.")
+    parser.add_argument('--runs', type=int, default=4)
+    parser.add_argument('--width', type=int, default=8)
+    parser.add_argument('--height', type=int, default=8)
+    parser.add_argument('--rollouts', type=int, default=ROLLOUTS)
+    parser.add_argument('--depth', type=int, default=DEPTH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = benchmark(args.runs, args.width, args.height, args.rollouts, args.depth, args.workers, args.seed)
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
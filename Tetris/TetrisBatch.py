@@ -0,0 +1,183 @@
+import argparse
+import time
+
+import numpy as np
+
+from TetrisCore import (BOARD_WIDTH, BOARD_HEIGHT, SHAPE_KEYS, ROTATIONS,
+                        ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_SOFT_DROP, ACTION_HARD_DROP)
+
+# Vectorized environment: N boards stepped in lockstep with NumPy, following the same
+# rules as GameBoard.will_collide, lock_block and clear_full_rows. Every step is one
+# decision: the action's move and rotation, then one row of gravity (or a hard drop).
+# Storing blocks is not supported in batch mode.
+QUEUE_LENGTH = 3  # Same number of upcoming blocks as GameBoard.next_blocks
+
+def build_cell_table():
+    """Return (cells, widths): the (dy, dx) offsets of the 4 cells of every shape and rotation."""
+    cells = np.zeros((len(SHAPE_KEYS), 4, 4, 2), dtype=np.int64)
+    widths = np.zeros((len(SHAPE_KEYS), 4), dtype=np.int64)
+    for shape_index, key in enumerate(SHAPE_KEYS):
+        for rotation, shape in enumerate(ROTATIONS[key]):
+            cells[shape_index, rotation] = [(y, x) for y, row in enumerate(shape) for x, val in enumerate(row) if val]
+            widths[shape_index, rotation] = len(shape[0])
+    return cells, widths
+
+CELLS, WIDTHS = build_cell_table()
+
+class BatchTetris:
+    def __init__(self, count, seed=None):
+        """Hold count boards as one (count, BOARD_HEIGHT, BOARD_WIDTH) array; 0 is empty, k is SHAPE_KEYS[k - 1]."""
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.board = np.zeros((count, BOARD_HEIGHT, BOARD_WIDTH), dtype=np.int8)
+        self.piece = np.zeros(count, dtype=np.int64)
+        self.rotation = np.zeros(count, dtype=np.int64)
+        self.x = np.zeros(count, dtype=np.int64)
+        self.y = np.zeros(count, dtype=np.int64)
+        self.queue = np.zeros((count, QUEUE_LENGTH), dtype=np.int64)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.lines_cleared = np.zeros(count, dtype=np.int64)
+        self.level = np.ones(count, dtype=np.int64)
+        self.done = np.zeros(count, dtype=bool)
+        self.rows = np.arange(count)
+        self.reset()
+
+    def reset(self, index=None):
+        """Start new games on the boards in index (all boards by default)."""
+        index = self.rows if index is None else np.atleast_1d(np.asarray(index))
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        self.board[index] = 0
+        self.score[index] = 0
+        self.lines_cleared[index] = 0
+        self.level[index] = 1
+        self.done[index] = False
+        self.queue[index] = self.rng.integers(len(SHAPE_KEYS), size=(len(index), QUEUE_LENGTH))
+        self.spawn(index)
+
+    def spawn(self, index):
+        """Take the next block from the queue of each board in index; boards that can't fit it are done."""
+        self.piece[index] = self.queue[index, 0]
+        self.queue[index, :-1] = self.queue[index, 1:]
+        self.queue[index, -1] = self.rng.integers(len(SHAPE_KEYS), size=len(index))
+        self.rotation[index] = 0
+        self.x[index] = BOARD_WIDTH // 2 - WIDTHS[self.piece[index], 0] // 2
+        self.y[index] = 0
+        self.done[index] |= self.collides(index, self.rotation[index], self.x[index], self.y[index])
+
+    def cells(self, index, rotation, x, y):
+        """Return the board coordinates (ys, xs) of the current block's cells, shape (len(index), 4)."""
+        offsets = CELLS[self.piece[index], rotation]
+        return y[:, None] + offsets[..., 0], x[:, None] + offsets[..., 1]
+
+    def collides(self, index, rotation, x, y):
+        """Vectorized GameBoard.will_collide for the boards in index at the given placements."""
+        ys, xs = self.cells(index, rotation, x, y)
+        outside = (xs < 0) | (xs >= BOARD_WIDTH) | (ys >= BOARD_HEIGHT)
+        filled = self.board[index[:, None], np.clip(ys, 0, BOARD_HEIGHT - 1), np.clip(xs, 0, BOARD_WIDTH - 1)] != 0
+        return (outside | (filled & (ys >= 0))).any(axis=1)
+
+    def try_move(self, index, rotation, x, y):
+        """Apply the placements that fit and return which ones did."""
+        fits = ~self.collides(index, rotation, x, y)
+        moved = index[fits]
+        self.rotation[moved] = rotation[fits]
+        self.x[moved] = x[fits]
+        self.y[moved] = y[fits]
+        return fits
+
+    def lock(self, index):
+        """Vectorized lock_block and clear_full_rows; returns the rows cleared per board."""
+        ys, xs = self.cells(index, self.rotation[index], self.x[index], self.y[index])
+        visible = ys >= 0
+        owners = np.broadcast_to(index[:, None], ys.shape)
+        self.board[owners[visible], ys[visible], xs[visible]] = self.piece[owners[visible]] + 1
+
+        full = (self.board[index] != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        clearing = index[cleared > 0]
+        if len(clearing):
+            full = full[cleared > 0]
+            # Stable sort puts the full rows on top in their original order, the rest keep theirs
+            order = np.argsort(~full, axis=1, kind='stable')
+            boards = np.take_along_axis(self.board[clearing], order[:, :, None], axis=1)
+            boards[np.arange(BOARD_HEIGHT)[None, :] < cleared[cleared > 0][:, None]] = 0
+            self.board[clearing] = boards
+
+        self.lines_cleared[index] += cleared
+        self.score[index] += cleared * 10
+        self.level[index] += self.lines_cleared[index] // 10 >= self.level[index]
+        return cleared
+
+    def step(self, actions):
+        """Apply one action bitmask per board and return (score gained, done) arrays."""
+        actions = np.broadcast_to(np.asarray(actions), (self.count,))
+        gained = np.zeros(self.count, dtype=np.int64)
+        live = self.rows[~self.done]
+        action = actions[live]
+
+        # Left takes priority over right, as in GameBoard.apply_action
+        shift = np.where(action & ACTION_LEFT, -1, np.where(action & ACTION_RIGHT, 1, 0))
+        moving = live[shift != 0]
+        self.try_move(moving, self.rotation[moving], self.x[moving] + shift[shift != 0], self.y[moving])
+
+        rotating = live[(action & ACTION_ROTATE) != 0]
+        self.try_move(rotating, (self.rotation[rotating] + 1) % 4, self.x[rotating], self.y[rotating])
+
+        # Hard drop: keep falling until every dropping block is blocked
+        dropping = live[(action & ACTION_HARD_DROP) != 0]
+        falling = dropping
+        while len(falling):
+            fits = self.try_move(falling, self.rotation[falling], self.x[falling], self.y[falling] + 1)
+            falling = falling[fits]
+
+        # Gravity moves everything else one row, soft drop one more; blocked blocks lock
+        stepping = live[(action & ACTION_HARD_DROP) == 0]
+        rows_down = 1 + ((actions[stepping] & ACTION_SOFT_DROP) != 0)
+        blocked = np.zeros(len(stepping), dtype=bool)
+        for row in range(2):
+            trying = np.flatnonzero(~blocked & (rows_down > row))
+            moving = stepping[trying]
+            fits = self.try_move(moving, self.rotation[moving], self.x[moving], self.y[moving] + 1)
+            blocked[trying[~fits]] = True
+        landed = np.concatenate([dropping, stepping[blocked]])
+
+        if len(landed):
+            gained[landed] = self.lock(landed) * 10
+            self.spawn(landed)
+        return gained, self.done.copy()
+
+def benchmark(count, steps, seed=0):
+    """Step count boards with random actions, resetting finished boards, and return the stats."""
+    env = BatchTetris(count, seed)
+    rng = np.random.default_rng(seed)
+    choices = np.array([0, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_SOFT_DROP, ACTION_HARD_DROP])
+    games = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, done = env.step(rng.choice(choices, size=count))
+        if done.any():
+            games += int(done.sum())
+            env.reset(done)
+    elapsed = time.perf_counter() - start
+    return {
+        'boards': count,
+        'steps': steps,
+        'games_finished': games,
+        'elapsed': elapsed,
+        'board_steps_per_second': count * steps / elapsed if elapsed else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batched Tetris environment.")
+    parser.add_argument('--boards', type=int, default=4096)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = benchmark(args.boards, args.steps, args.seed)
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
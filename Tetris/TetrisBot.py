@@ -0,0 +1,252 @@
+import argparse
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from operator import sub
+
+from TetrisCore import (GameBoard, BOARD_WIDTH, BOARD_HEIGHT, FULL_ROW, SHAPES, ROTATION_MASKS,
+                        ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_HARD_DROP)
+
+# Autoplayer: enumerates every (rotation, column) landing spot on the bitboard and
+# picks the one the heuristic likes best, optionally looking ahead through next_blocks.
+CACHE_SIZE = 100000  # Maximum number of cached (board, pieces) decisions
+
+def build_orientations(shape_key):
+    """Return (rotation, masks, width, bottoms, tops) for each distinct rotation of a shape.
+
+    bottoms[c] and tops[c] are the lowest and highest rows of the shape with a cell in column c.
+    """
+    orientations = []
+    seen = set()
+    for rotation, masks in enumerate(ROTATION_MASKS[shape_key]):
+        if masks in seen:  # O, I, S and Z repeat their rotations
+            continue
+        seen.add(masks)
+        width = max(mask.bit_length() for mask in masks)
+        cells = [[row for row, mask in enumerate(masks) if mask >> col & 1] for col in range(width)]
+        orientations.append((rotation, masks, width, [max(rows) for rows in cells], [min(rows) for rows in cells]))
+    return orientations
+
+ORIENTATIONS = {key: build_orientations(key) for key in SHAPES}
+
+def board_features(rows):
+    """Return the column heights and the number of holes of a bitboard."""
+    heights = [0] * BOARD_WIDTH
+    seen = 0
+    holes = 0
+    for y, row in enumerate(rows):
+        if seen:
+            holes += (seen & ~row).bit_count()  # Empty cells with a filled cell somewhere above
+        new = row & ~seen
+        if new:
+            height = BOARD_HEIGHT - y
+            while new:
+                low = new & -new
+                heights[low.bit_length() - 1] = height
+                new ^= low
+            seen |= row
+    return heights, holes
+
+class Heuristic:
+    """Linear placement score.
+
+    Any callable taking (rows, heights, holes, lines_cleared) can be used instead.
+    """
+
+    def __init__(self, height=-0.51, lines=0.76, holes=-0.36, bumpiness=-0.18):
+        self.height = height
+        self.lines = lines
+        self.holes = holes
+        self.bumpiness = bumpiness
+
+    def __call__(self, rows, heights, holes, lines_cleared):
+        bumpiness = sum(map(abs, map(sub, heights[1:], heights)))
+        return (self.height * sum(heights) + self.lines * lines_cleared
+                + self.holes * holes + self.bumpiness * bumpiness)
+
+def placements(rows, shape_key, heights, holes):
+    """Yield (rotation, x, new_rows, new_heights, new_holes, lines_cleared) for every landing spot.
+
+    heights and holes describe rows; they are updated incrementally unless the placement clears lines.
+    """
+    for rotation, masks, width, bottoms, tops in ORIENTATIONS[shape_key]:
+        floors = [BOARD_HEIGHT - 1 - bottom for bottom in bottoms]  # Landing row of each column on an empty board
+        for x in range(BOARD_WIDTH - width + 1):
+            y = min(map(sub, floors, heights[x:x + width]))
+            if y < 0:  # The piece would stick out of the top of the board
+                continue
+            new_rows = list(rows)
+            full = []
+            for row_index, mask in enumerate(masks):
+                row = new_rows[y + row_index] | mask << x
+                new_rows[y + row_index] = row
+                if row == FULL_ROW:
+                    full.append(y + row_index)
+            if full:
+                for row_index in full:
+                    del new_rows[row_index]
+                    new_rows.insert(0, 0)
+                new_heights, new_holes = board_features(new_rows)
+            else:
+                new_heights = list(heights)
+                new_holes = holes
+                for col in range(width):
+                    # Cells left open between the piece and the old column top become holes
+                    new_holes += BOARD_HEIGHT - heights[x + col] - y - bottoms[col] - 1
+                    new_heights[x + col] = BOARD_HEIGHT - y - tops[col]
+            yield rotation, x, new_rows, new_heights, new_holes, len(full)
+
+def search(rows, heights, holes, shape_keys, heuristic, lines_cleared=0):
+    """Return the best score reachable by placing every piece in shape_keys in order."""
+    best = None
+    last = len(shape_keys) == 1
+    for _, _, new_rows, new_heights, new_holes, lines in placements(rows, shape_keys[0], heights, holes):
+        if last:
+            score = heuristic(new_rows, new_heights, new_holes, lines_cleared + lines)
+        else:
+            score = search(new_rows, new_heights, new_holes, shape_keys[1:], heuristic, lines_cleared + lines)
+        if score is not None and (best is None or score > best):
+            best = score
+    return best
+
+def search_subtree(rows, heights, holes, shape_keys, heuristic, lines_cleared):
+    """Process pool entry point for one first-level candidate."""
+    return search(rows, heights, holes, shape_keys, heuristic, lines_cleared)
+
+class Autoplayer:
+    def __init__(self, heuristic=None, lookahead=0, workers=None):
+        """lookahead is the number of next_blocks to search through; workers > 1 spreads it over processes."""
+        self.heuristic = heuristic or Heuristic()
+        self.lookahead = lookahead
+        self.cache = OrderedDict()
+        self.evaluated = 0  # First-level placements scored so far
+        self.pool = ProcessPoolExecutor(workers) if workers and workers > 1 and lookahead else None
+        self.target = None
+        self.target_piece = None
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def best_placement(self, rows, shape_keys):
+        """Return the (rotation, x) with the best score for the first of shape_keys, or None."""
+        key = (tuple(rows), tuple(shape_keys))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        heights, holes = board_features(rows)
+        candidates = list(placements(rows, shape_keys[0], heights, holes))
+        self.evaluated += len(candidates)
+        rest = shape_keys[1:]
+        if not rest:
+            scores = [self.heuristic(*candidate[2:]) for candidate in candidates]
+        elif self.pool:
+            futures = [self.pool.submit(search_subtree, *candidate[2:5], rest, self.heuristic, candidate[5])
+                       for candidate in candidates]
+            scores = [future.result() for future in futures]
+        else:
+            scores = [search(*candidate[2:5], rest, self.heuristic, candidate[5]) for candidate in candidates]
+
+        best = None
+        best_score = None
+        for (rotation, x, *_), score in zip(candidates, scores):
+            if score is not None and (best_score is None or score > best_score):
+                best, best_score = (rotation, x), score
+        if best is None and candidates:  # Every deeper line tops out, just take the best single move
+            best = candidates[0][:2]
+
+        self.cache[key] = best
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return best
+
+    def choose(self, board):
+        """Pick the placement for the board's current block."""
+        shape_keys = [board.current_block.shape_key]
+        shape_keys += [block.shape_key for block in board.next_blocks[:self.lookahead]]
+        return self.best_placement(board.rows, shape_keys)
+
+    def play_piece(self, board):
+        """Place the current block directly at the chosen spot and spawn the next one."""
+        block = board.current_block
+        placement = self.choose(board)
+        if placement is not None:
+            rotation, x = placement
+            block.set_rotation(rotation)
+            block.x = x
+        if board.collides(block.masks, block.x, block.y):
+            board.game_state = "game_over"
+            return
+        board.hard_drop()
+
+    def policy(self, board, rng):
+        """Per-tick policy for the runner: rotate and shift towards the target, then hard drop."""
+        block = board.current_block
+        if self.target_piece is not block:
+            self.target_piece = block
+            self.target = self.choose(board)
+        if self.target is None:
+            return ACTION_HARD_DROP
+        rotation, x = self.target
+        action = 0
+        if block.rotation != rotation:
+            action |= ACTION_ROTATE
+        if block.x > x:
+            action |= ACTION_LEFT
+        elif block.x < x:
+            action |= ACTION_RIGHT
+        return action or ACTION_HARD_DROP
+
+def make_bot_policy():
+    """Runner policy of a new Autoplayer; each board needs its own, as the policy tracks its block."""
+    return Autoplayer().policy
+
+def benchmark(pieces, lookahead=0, workers=None, seed=0):
+    """Play pieces directly (no ticks) and return the stats, counting every scored landing spot as a placement."""
+    board = GameBoard(seed)
+    board.start()
+    placed = 0
+    games = 1
+    start = time.perf_counter()
+    with Autoplayer(lookahead=lookahead, workers=workers) as bot:
+        while placed < pieces:
+            if board.game_state != "playing":
+                board = GameBoard(seed + games)
+                board.start()
+                games += 1
+            bot.play_piece(board)
+            placed += 1
+        evaluated = bot.evaluated
+    elapsed = time.perf_counter() - start
+    return {
+        'pieces': placed,
+        'games': games,
+        'lines': board.lines_cleared,
+        'elapsed': elapsed,
+        'pieces_per_second': placed / elapsed if elapsed else 0,
+        'placements_per_second': evaluated / elapsed if elapsed else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Tetris autoplayer.")
+    parser.add_argument('--pieces', type=int, default=10000)
+    parser.add_argument('--lookahead', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    report = benchmark(args.pieces, args.lookahead, args.workers, args.seed)
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
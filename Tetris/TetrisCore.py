@@ -0,0 +1,436 @@
+import random
+
+# Pure game logic for Tetris. Nothing in this module imports pygame, so it can
+# run headless (bots, simulations, servers) and is driven by explicit ticks.
+
+# Board settings
+BOARD_WIDTH = 10  # 10 blocks wide
+BOARD_HEIGHT = 17  # 17 blocks tall
+INITIAL_DROP_SPEED = 600  # Set a moderate drop speed in milliseconds
+TICKS_PER_SECOND = 60  # Logic ticks per second, one per frame in the pygame version
+
+# Input delays in milliseconds
+MOVE_DELAY = 100  # Faster response for moving left and right
+ROTATION_DELAY = 500  # Slower response for rotating
+SOFT_DROP_DELAY = 300  # Faster response for soft drop
+HARD_DROP_DELAY = 500  # Delay between hard drops
+NEVER = -10 ** 9  # Timestamp for inputs that have not been used yet
+SEED_RANGE = 1 << 64  # Seeds are reduced to 0 <= seed < SEED_RANGE, the range replay files store
+
+# Actions, combined as a bitmask per tick
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_ROTATE = 4
+ACTION_SOFT_DROP = 8
+ACTION_HARD_DROP = 16
+ACTION_STORE = 32
+ACTION_USE_STORED = 64
+ALL_ACTIONS = 127
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREY = (150, 150, 150)
+RED = (255, 0, 0)
+ORANGE = (255, 165, 0)
+YELLOW = (255, 255, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+INDIGO = (75, 0, 130)
+VIOLET = (238, 130, 238)
+
+# Block colors
+BLOCK_COLORS = {
+    'O': RED,
+    'I': ORANGE,
+    'S': YELLOW,
+    'Z': GREEN,
+    'L': BLUE,
+    'J': INDIGO,
+    'T': VIOLET,
+}
+
+# Block shapes
+SHAPES = {
+    'O': [[1, 1], [1, 1]],
+    'I': [[1], [1], [1], [1]],
+    'S': [[0, 1, 1], [1, 1, 0]],
+    'Z': [[1, 1, 0], [0, 1, 1]],
+    'L': [[1, 0], [1, 0], [1, 1]],
+    'J': [[0, 1], [0, 1], [1, 1]],
+    'T': [[1, 1, 1], [0, 1, 0]],
+}
+SHAPE_KEYS = list(SHAPES.keys())
+
+# Bitboard settings: one integer per board row, bit x set when column x is filled
+FULL_ROW = (1 << BOARD_WIDTH) - 1
+
+def shape_masks(shape):
+    """Convert a shape grid into a tuple of row bitmasks (bit x = column x)."""
+    return tuple(sum(1 << x for x, val in enumerate(row) if val) for row in shape)
+
+def build_rotations(shape):
+    """Return the four clockwise rotation states of a shape."""
+    states = [shape]
+    for _ in range(3):
+        states.append([list(row) for row in zip(*states[-1][::-1])])
+    return states
+
+# Precomputed rotation tables, indexed by shape key and rotation (0-3)
+ROTATIONS = {key: build_rotations(shape) for key, shape in SHAPES.items()}
+ROTATION_MASKS = {key: [shape_masks(state) for state in states] for key, states in ROTATIONS.items()}
+
+def shape_bottoms(shape):
+    """Return the lowest filled row of each column of a shape grid."""
+    return [max(row_index for row_index, row in enumerate(shape) if row[col_index])
+            for col_index in range(len(shape[0]))]
+
+# Row of the board floor each column of a rotation lands on when the board is empty
+ROTATION_FLOORS = {key: [[BOARD_HEIGHT - 1 - bottom for bottom in shape_bottoms(state)] for state in states]
+                   for key, states in ROTATIONS.items()}
+
+class Block:
+    def __init__(self, shape_key):
+        """Initialize a block with a shape and fixed color."""
+        self.shape_key = shape_key
+        self.rotation = 0
+        self.shape = ROTATIONS[shape_key][0]
+        self.masks = ROTATION_MASKS[shape_key][0]
+        self.color = BLOCK_COLORS[shape_key]
+        self.x = BOARD_WIDTH // 2 - len(self.shape[0]) // 2
+        self.y = 0
+
+    def rotate(self, board):
+        """Rotate the block shape clockwise if it fits on the given board."""
+        new_rotation = (self.rotation + 1) % 4
+        new_masks = ROTATION_MASKS[self.shape_key][new_rotation]
+        if not board.collides(new_masks, self.x, self.y):  # Check if rotation will cause collision
+            self.set_rotation(new_rotation)
+
+    def set_rotation(self, rotation):
+        """Switch to one of the precomputed rotation states without any collision check."""
+        self.rotation = rotation
+        self.shape = ROTATIONS[self.shape_key][rotation]
+        self.masks = ROTATION_MASKS[self.shape_key][rotation]
+
+    def reset_position(self):
+        """Reset the block position to the top of the board."""
+        self.x = BOARD_WIDTH // 2 - len(self.shape[0]) // 2
+        self.y = 0
+
+def block_state(block):
+    """Describe a block as (shape key, rotation, x, y), or None."""
+    if block is None:
+        return None
+    return (block.shape_key, block.rotation, block.x, block.y)
+
+def block_from_state(state):
+    """Rebuild a block described by block_state()."""
+    if state is None:
+        return None
+    shape_key, rotation, x, y = state
+    block = Block(shape_key)
+    block.set_rotation(rotation)
+    block.x = x
+    block.y = y
+    return block
+
+class GameBoard:
+    def __init__(self, seed=None):
+        """Initialize the game board with empty spaces and a seeded block generator."""
+        self.rows = [0] * BOARD_HEIGHT  # Bitboard used for collision and line checks
+        self.heights = [0] * BOARD_WIDTH  # Skyline: height of the highest locked cell in each column
+        self.row_counts = [0] * BOARD_HEIGHT  # Number of locked cells in each row
+        self.board = [[WHITE for _ in range(BOARD_WIDTH)] for _ in range(BOARD_HEIGHT)]
+        self.changed_rows = set(range(BOARD_HEIGHT))  # Rows of the colour plane changed since the last redraw
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.pieces = 0
+        self.stored_block = None
+        self.current_block = None
+        # Always known, so runs can be replayed; any int is accepted and reduced to the replay range
+        self.seed = seed % SEED_RANGE if seed is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.seed)
+        self.next_blocks = [Block(self.rng.choice(SHAPE_KEYS)) for _ in range(3)]
+        self.drop_speed = INITIAL_DROP_SPEED
+        self.tick = 0
+        self.time = 0  # Game time in milliseconds, derived from the tick counter
+        self.last_drop_time = 0
+        self.last_move_time = NEVER
+        self.last_rotation_time = NEVER
+        self.last_hard_drop_time = NEVER
+        self.game_state = "menu"
+
+    def snapshot(self):
+        """Capture the full game state, including the block generator, as plain data."""
+        return {
+            'rows': list(self.rows),
+            'heights': list(self.heights),
+            'row_counts': list(self.row_counts),
+            'board': [list(row) for row in self.board],
+            'score': self.score,
+            'level': self.level,
+            'lines_cleared': self.lines_cleared,
+            'pieces': self.pieces,
+            'stored_block': block_state(self.stored_block),
+            'current_block': block_state(self.current_block),
+            'next_blocks': [block_state(block) for block in self.next_blocks],
+            'rng': self.rng.getstate(),
+            'drop_speed': self.drop_speed,
+            'tick': self.tick,
+            'time': self.time,
+            'last_drop_time': self.last_drop_time,
+            'last_move_time': self.last_move_time,
+            'last_rotation_time': self.last_rotation_time,
+            'last_hard_drop_time': self.last_hard_drop_time,
+            'game_state': self.game_state,
+        }
+
+    def restore(self, state):
+        """Return to a state captured by snapshot()."""
+        self.rows = list(state['rows'])
+        self.heights = list(state['heights'])
+        self.row_counts = list(state['row_counts'])
+        self.board = [list(row) for row in state['board']]
+        self.changed_rows = set(range(BOARD_HEIGHT))
+        self.score = state['score']
+        self.level = state['level']
+        self.lines_cleared = state['lines_cleared']
+        self.pieces = state['pieces']
+        self.stored_block = block_from_state(state['stored_block'])
+        self.current_block = block_from_state(state['current_block'])
+        self.next_blocks = [block_from_state(block) for block in state['next_blocks']]
+        self.rng.setstate(state['rng'])
+        self.drop_speed = state['drop_speed']
+        self.tick = state['tick']
+        self.time = state['time']
+        self.last_drop_time = state['last_drop_time']
+        self.last_move_time = state['last_move_time']
+        self.last_rotation_time = state['last_rotation_time']
+        self.last_hard_drop_time = state['last_hard_drop_time']
+        self.game_state = state['game_state']
+
+    def start(self):
+        """Spawn the first block and start playing."""
+        self.new_block()
+        if self.game_state != "game_over":
+            self.game_state = "playing"
+
+    def new_block(self):
+        """Create a new block from the next_blocks list and store the current one."""
+        self.current_block = self.next_blocks.pop(0)
+        self.next_blocks.append(Block(self.rng.choice(SHAPE_KEYS)))
+        self.pieces += 1
+        block = self.current_block
+        # Above the skyline nothing can collide, so only probe when the block spawns below it
+        if self.skyline_y(block) < block.y and self.collides(block.masks, block.x, block.y):
+            self.game_state = "game_over"
+
+    def step(self, action=0):
+        """Advance the game by one tick: apply gravity, then the action bitmask."""
+        if self.game_state != "playing":
+            return
+        self.tick += 1
+        self.time = self.tick * 1000 // TICKS_PER_SECOND
+        if self.time - self.last_drop_time > self.drop_speed:
+            self.move_block(0, 1)
+            self.last_drop_time = self.time
+        if action and self.game_state == "playing":
+            self.apply_action(action)
+
+    def apply_action(self, action):
+        """Apply an action bitmask at the current game time, honouring the input delays."""
+        current_time = self.time
+
+        if action & ACTION_LEFT and current_time - self.last_move_time > MOVE_DELAY:
+            self.move_block(-1, 0)
+            self.last_move_time = current_time
+        elif action & ACTION_RIGHT and current_time - self.last_move_time > MOVE_DELAY:
+            self.move_block(1, 0)
+            self.last_move_time = current_time
+
+        if action & ACTION_ROTATE and current_time - self.last_rotation_time > ROTATION_DELAY:
+            self.rotate_block()
+            self.last_rotation_time = current_time
+
+        # Soft drop shares its timer with gravity
+        if action & ACTION_SOFT_DROP and current_time - self.last_drop_time > SOFT_DROP_DELAY:
+            self.move_block(0, 1)
+            self.last_drop_time = current_time
+
+        if action & ACTION_STORE:
+            self.store_current_block()
+
+        if action & ACTION_USE_STORED:
+            self.use_stored_block()
+
+        if action & ACTION_HARD_DROP and current_time - self.last_hard_drop_time > HARD_DROP_DELAY:
+            self.hard_drop()
+            self.last_hard_drop_time = current_time
+
+    def move_block(self, dx, dy):
+        """Move the current block by a certain amount if there is no collision."""
+        if not self.will_collide(self.current_block.shape, dx, dy):
+            self.current_block.x += dx
+            self.current_block.y += dy
+        elif dy > 0:  # If moving down and collides, lock the block
+            self.lock_block()
+            self.new_block()
+
+    def rotate_block(self):
+        """Rotate the current block if possible."""
+        self.current_block.rotate(self)
+
+    def hard_drop(self):
+        """Drop the current block to its landing row, lock it and spawn the next one."""
+        self.current_block.y = self.landing_y(self.current_block)
+        self.lock_block()
+        self.new_block()
+
+    def skyline_y(self, block):
+        """Get the lowest y-position where the block still sits entirely above the skyline."""
+        floors = ROTATION_FLOORS[block.shape_key][block.rotation]
+        heights = self.heights
+        x = block.x
+        return min(floor - heights[x + col_index] for col_index, floor in enumerate(floors))
+
+    def landing_y(self, block):
+        """Get the y-position where the block will land."""
+        y = self.skyline_y(block)
+        if y >= block.y:
+            return y
+        # The block is tucked under an overhang, so fall back to probing row by row
+        y = block.y
+        while not self.collides(block.masks, block.x, y + 1):
+            y += 1
+        return y
+
+    def store_current_block(self):
+        """Store the current block in the inventory or switch with the stored block."""
+        if self.stored_block is None:
+            self.stored_block = Block(self.current_block.shape_key)  # Store a new instance of the block in its original form
+            self.new_block()
+        else:
+            # Swap the current block with the stored block and reset position
+            self.current_block, self.stored_block = self.stored_block, Block(self.current_block.shape_key)
+            self.current_block.reset_position()
+
+    def use_stored_block(self):
+        """Use the stored block if available."""
+        if self.stored_block:
+            self.current_block, self.stored_block = self.stored_block, Block(self.current_block.shape_key)
+            self.current_block.reset_position()
+
+    def lock_block(self):
+        """Lock the current block into the board and check for full rows."""
+        block = self.current_block
+        locked_rows = []
+        for row_index, mask in enumerate(block.masks):
+            y = block.y + row_index
+            if y >= 0:
+                self.rows[y] |= mask << block.x
+                locked_rows.append(y)
+                for col_index, val in enumerate(block.shape[row_index]):
+                    if val:
+                        x = block.x + col_index
+                        self.board[y][x] = block.color  # The colour plane is only used for drawing
+                        self.row_counts[y] += 1
+                        if self.heights[x] < BOARD_HEIGHT - y:
+                            self.heights[x] = BOARD_HEIGHT - y
+        self.changed_rows.update(locked_rows)
+        rows_cleared = self.clear_full_rows(locked_rows)
+        self.lines_cleared += rows_cleared
+        self.score += rows_cleared * 10
+        self.update_level()
+
+    def clear_full_rows(self, rows=None):
+        """Clear any full rows from the board and return the number of rows cleared.
+
+        rows limits the check to the given row indices, e.g. the rows a block was just locked into.
+        """
+        if rows is None:
+            rows = range(BOARD_HEIGHT)
+        rows_to_clear = sorted(index for index in rows if self.row_counts[index] == BOARD_WIDTH)
+        for row_index in rows_to_clear:
+            del self.rows[row_index]
+            self.rows.insert(0, 0)
+            del self.row_counts[row_index]
+            self.row_counts.insert(0, 0)
+            del self.board[row_index]
+            self.board.insert(0, [WHITE for _ in range(BOARD_WIDTH)])
+        if rows_to_clear:
+            # Everything from the old top of the stack down to the lowest cleared row moved
+            self.changed_rows.update(range(BOARD_HEIGHT - max(self.heights), rows_to_clear[-1] + 1))
+            self.rebuild_heights()
+        return len(rows_to_clear)
+
+    def add_garbage(self, count, hole):
+        """Push count grey rows, full except for column hole, up from the bottom of the board.
+
+        Locked cells pushed off the top end the game; the falling block is lifted if it would overlap.
+        """
+        count = min(count, BOARD_HEIGHT)
+        if count <= 0:
+            return
+        if any(self.rows[:count]):
+            self.game_state = "game_over"
+        garbage = FULL_ROW & ~(1 << hole)
+        self.rows = self.rows[count:] + [garbage] * count
+        self.row_counts = self.row_counts[count:] + [BOARD_WIDTH - 1] * count
+        self.board = self.board[count:] + [[WHITE if x == hole else GREY for x in range(BOARD_WIDTH)]
+                                           for _ in range(count)]
+        self.changed_rows.update(range(BOARD_HEIGHT))
+        self.rebuild_heights(0)
+        block = self.current_block
+        if block is not None:
+            while block.y > -len(block.masks) and self.collides(block.masks, block.x, block.y):
+                block.y -= 1
+
+    def rebuild_heights(self, top=None):
+        """Recompute the skyline from the bitboard, starting at row top (the highest non-empty row by default)."""
+        heights = [0] * BOARD_WIDTH
+        seen = 0
+        if top is None:
+            top = BOARD_HEIGHT - max(self.heights)
+        for y in range(top, BOARD_HEIGHT):
+            new = self.rows[y] & ~seen
+            while new:
+                low = new & -new
+                heights[low.bit_length() - 1] = BOARD_HEIGHT - y
+                new ^= low
+            seen |= self.rows[y]
+            if seen == FULL_ROW:
+                break
+        self.heights = heights
+
+    def update_level(self):
+        """Increase the level and speed based on lines cleared."""
+        if self.lines_cleared // 10 >= self.level:
+            self.level += 1
+            self.drop_speed = max(200, self.drop_speed - 50)
+
+    def will_collide(self, shape, dx, dy):
+        """Check if moving or rotating the block will cause a collision."""
+        block = self.current_block
+        masks = block.masks if shape is block.shape else shape_masks(shape)
+        return self.collides(masks, block.x + dx, block.y + dy)
+
+    def collides(self, masks, x, y):
+        """Check if row masks placed with their left edge at (x, y) hit a wall, the floor or a locked cell."""
+        for row_index, mask in enumerate(masks):
+            if x < 0:
+                if mask & ((1 << -x) - 1):  # Cells left of the board
+                    return True
+                mask >>= -x
+            else:
+                mask <<= x
+            if mask > FULL_ROW:  # Cells right of the board
+                return True
+            new_y = y + row_index
+            if new_y >= BOARD_HEIGHT:
+                if mask:  # Cells below the floor
+                    return True
+            elif new_y >= 0 and mask & self.rows[new_y]:
+                return True
+        return False
@@ -0,0 +1,214 @@
+import argparse
+import bisect
+import struct
+import time
+
+from TetrisCore import GameBoard, SHAPE_KEYS, BOARD_WIDTH, BOARD_HEIGHT, TICKS_PER_SECOND
+
+# Replay files: a fixed header, one byte per spawned block and the per-tick
+# input bitmasks run-length encoded as (action byte, varint run length).
+# Keyframes are not saved: a loaded replay builds them as playback passes them, so the
+# first seek past the furthest tick played so far replays every tick up to it.
+MAGIC = b'TRPL'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBQII')  # magic, version, board width, board height, seed, ticks, blocks
+KEYFRAME_INTERVAL = 10 * TICKS_PER_SECOND  # Snapshot the board every 10 seconds of game time
+
+class ReplayError(Exception):
+    """Raised for unreadable replay files and replays that no longer reproduce."""
+
+def encode_varint(value, out):
+    """Append an unsigned LEB128 varint to a bytearray."""
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_varint(data, offset):
+    """Read an unsigned LEB128 varint, returning (value, next offset)."""
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("Truncated replay")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class Replay:
+    def __init__(self, seed, pieces=b'', inputs=b''):
+        """seed of the recorded board, the shape index of every block it spawned and one action per tick."""
+        self.seed = seed
+        self.pieces = bytearray(pieces)
+        self.inputs = bytearray(inputs)
+        self.keyframes = {}  # tick -> (board snapshot, blocks spawned), filled while recording only
+
+    def to_bytes(self):
+        """Serialize the replay."""
+        out = bytearray(HEADER.pack(MAGIC, VERSION, BOARD_WIDTH, BOARD_HEIGHT, self.seed,
+                                    len(self.inputs), len(self.pieces)))
+        out += self.pieces
+        index = 0
+        while index < len(self.inputs):
+            action = self.inputs[index]
+            run = 1
+            while index + run < len(self.inputs) and self.inputs[index + run] == action:
+                run += 1
+            out.append(action)
+            encode_varint(run, out)
+            index += run
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Parse a replay produced by to_bytes()."""
+        if len(data) < HEADER.size:
+            raise ReplayError("Truncated replay")
+        magic, version, width, height, seed, ticks, blocks = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ReplayError("Not a Tetris replay")
+        if (width, height) != (BOARD_WIDTH, BOARD_HEIGHT):
+            raise ReplayError(f"Replay was recorded on a {width}x{height} board")
+        offset = HEADER.size
+        pieces = data[offset:offset + blocks]
+        offset += blocks
+        inputs = bytearray()
+        while len(inputs) < ticks:
+            if offset >= len(data):
+                raise ReplayError("Truncated replay")
+            action = data[offset]
+            run, offset = decode_varint(data, offset + 1)
+            inputs += bytes([action]) * run
+        return cls(seed, pieces, inputs[:ticks])
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+class PieceTracker:
+    def __init__(self, board):
+        """Follow the blocks a board appends to next_blocks, one per new_block() call."""
+        self.board = board
+        self.seen = board.pieces - len(board.next_blocks)
+
+    def new_pieces(self):
+        """Return the shape indices of blocks generated since the last call."""
+        count = self.board.pieces - self.seen
+        self.seen = self.board.pieces
+        return [SHAPE_KEYS.index(block.shape_key) for block in self.board.next_blocks[-count:]] if count else []
+
+class Recorder:
+    def __init__(self, board, keyframe_interval=KEYFRAME_INTERVAL):
+        """Record a game played on board from before board.start() is called."""
+        self.board = board
+        self.keyframe_interval = keyframe_interval
+        self.replay = Replay(board.seed)
+        self.pieces = PieceTracker(board)
+        self.replay.pieces += bytes(self.pieces.new_pieces())
+
+    def start(self):
+        self.board.start()
+        self.replay.pieces += bytes(self.pieces.new_pieces())
+
+    def step(self, action):
+        """Step the board with action, recording it while the game is running."""
+        if self.board.game_state != "playing":
+            return
+        self.replay.inputs.append(action)
+        self.board.step(action)
+        self.replay.pieces += bytes(self.pieces.new_pieces())
+        if self.board.tick % self.keyframe_interval == 0:
+            self.replay.keyframes[self.board.tick] = (self.board.snapshot(), len(self.replay.pieces))
+
+class ReplayPlayer:
+    def __init__(self, replay, board=None, keyframe_interval=KEYFRAME_INTERVAL):
+        """Rebuild a recorded run on board (a fresh GameBoard by default)."""
+        self.replay = replay
+        self.board = board if board is not None else GameBoard(replay.seed)
+        if self.board.seed != replay.seed:
+            raise ReplayError("Board seed does not match the replay")
+        self.keyframe_interval = keyframe_interval
+        self.pieces = PieceTracker(self.board)
+        self.piece_index = 0
+        self.check_pieces()
+        self.board.start()
+        self.check_pieces()
+        self.keyframes = {0: (self.board.snapshot(), self.piece_index), **replay.keyframes}
+        self.keyframe_ticks = sorted(self.keyframes)
+
+    @property
+    def tick(self):
+        return self.board.tick
+
+    @property
+    def finished(self):
+        return self.board.tick >= len(self.replay.inputs) or self.board.game_state != "playing"
+
+    def check_pieces(self):
+        """Make sure the board spawns exactly the recorded blocks."""
+        for piece in self.pieces.new_pieces():
+            if self.piece_index >= len(self.replay.pieces) or self.replay.pieces[self.piece_index] != piece:
+                raise ReplayError(f"Replay desynced at tick {self.board.tick}, block {self.piece_index}")
+            self.piece_index += 1
+
+    def step(self):
+        """Play back one tick."""
+        if self.finished:
+            return
+        self.board.step(self.replay.inputs[self.board.tick])
+        self.check_pieces()
+        tick = self.board.tick
+        if tick % self.keyframe_interval == 0 and tick not in self.keyframes:
+            bisect.insort(self.keyframe_ticks, tick)
+            self.keyframes[tick] = (self.board.snapshot(), self.piece_index)
+
+    def fast_forward(self, tick=None):
+        """Play back without rendering up to tick, or to the end of the replay."""
+        end = len(self.replay.inputs) if tick is None else tick
+        while self.board.tick < end and not self.finished:
+            self.step()
+
+    def seek(self, tick):
+        """Jump to tick by restoring the closest earlier keyframe and playing forward from it.
+
+        Only ticks already played, or keyframed while recording, have keyframes, so seeking
+        further ahead plays forward from the last one.
+        """
+        tick = max(0, min(tick, len(self.replay.inputs)))
+        keyframe_tick = self.keyframe_ticks[bisect.bisect_right(self.keyframe_ticks, tick) - 1]
+        if not keyframe_tick <= self.board.tick <= tick:
+            state, self.piece_index = self.keyframes[keyframe_tick]
+            self.board.restore(state)
+            self.pieces.seen = self.board.pieces
+        self.fast_forward(tick)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fast-forward a Tetris replay and print the final state.")
+    parser.add_argument('path')
+    parser.add_argument('--tick', type=int, default=None, help="Stop at this tick instead of the end")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay)
+    start = time.perf_counter()
+    if args.tick is not None:
+        player.seek(args.tick)
+    else:
+        player.fast_forward()
+    elapsed = time.perf_counter() - start
+    board = player.board
+    print(f"seed: {replay.seed}")
+    print(f"tick: {board.tick} / {len(replay.inputs)}")
+    print(f"score: {board.score}, lines: {board.lines_cleared}, level: {board.level}, state: {board.game_state}")
+    print(f"ticks_per_second: {board.tick / elapsed if elapsed else 0:.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import multiprocessing
+import random
+import time
+from functools import partial
+
+from TetrisBot import make_bot_policy
+from TetrisCore import (GameBoard, ALL_ACTIONS, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE,
+                        ACTION_HARD_DROP)
+
+# Self-play runner: plays many seeded headless games across a process pool
+MAX_TICKS = 60 * 60 * 60  # Stop a game after one hour of game time
+
+def random_policy(board, rng):
+    """Press a random combination of keys every tick."""
+    return rng.randrange(ALL_ACTIONS + 1)
+
+def drop_policy(board, rng):
+    """Nudge the block sideways or rotate it a little, then hard drop it."""
+    roll = rng.random()
+    if roll < 0.3:
+        return ACTION_LEFT
+    if roll < 0.6:
+        return ACTION_RIGHT
+    if roll < 0.7:
+        return ACTION_ROTATE
+    return ACTION_HARD_DROP
+
+# Policy factories: every game and client makes its own policy, so stateful ones
+# like the bot's never share state between boards
+POLICIES = {
+    'random': lambda: random_policy,
+    'drop': lambda: drop_policy,
+    'bot': make_bot_policy,
+}
+
+def play_game(seed, policy='drop', max_ticks=MAX_TICKS):
+    """Play one seeded game to the end and return its stats."""
+    board = GameBoard(seed)
+    rng = random.Random(seed)  # Separate stream so the policy doesn't change the block sequence
+    choose_action = POLICIES[policy]() if isinstance(policy, str) else policy
+    board.start()
+    while board.game_state == "playing" and board.tick < max_ticks:
+        board.step(choose_action(board, rng))
+    return {
+        'seed': seed,
+        'score': board.score,
+        'lines': board.lines_cleared,
+        'level': board.level,
+        'pieces': board.pieces,
+        'ticks': board.tick,
+    }
+
+def summarize(results, elapsed):
+    """Aggregate per-game stats into a single report."""
+    games = len(results)
+    scores = [result['score'] for result in results]
+    ticks = sum(result['ticks'] for result in results)
+    return {
+        'games': games,
+        'mean_score': sum(scores) / games if games else 0,
+        'min_score': min(scores, default=0),
+        'max_score': max(scores, default=0),
+        'mean_lines': sum(result['lines'] for result in results) / games if games else 0,
+        'mean_pieces': sum(result['pieces'] for result in results) / games if games else 0,
+        'total_ticks': ticks,
+        'elapsed': elapsed,
+        'games_per_minute': games * 60 / elapsed if elapsed else 0,
+        'ticks_per_second': ticks / elapsed if elapsed else 0,
+    }
+
+def run_games(games, workers=None, base_seed=0, policy='drop', max_ticks=MAX_TICKS):
+    """Play games with seeds base_seed..base_seed+games-1 on a process pool and summarize them."""
+    seeds = range(base_seed, base_seed + games)
+    play = partial(play_game, policy=policy, max_ticks=max_ticks)
+    start = time.perf_counter()
+    if workers == 1:
+        results = [play(seed) for seed in seeds]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            # Large chunks keep the pickling overhead small compared to the games themselves
+            chunksize = max(1, games // ((workers or multiprocessing.cpu_count()) * 8))
+            results = pool.map(play, seeds, chunksize=chunksize)
+    return summarize(results, time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless Tetris self-play games.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all CPUs)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first game")
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='drop')
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    args = parser.parse_args()
+
+    report = run_games(args.games, args.workers, args.seed, args.policy, args.max_ticks)
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()
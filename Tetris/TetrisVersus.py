@@ -0,0 +1,361 @@
+import argparse
+import asyncio
+import random
+import struct
+import time
+
+from TetrisCore import (GameBoard, Block, BOARD_WIDTH, BOARD_HEIGHT, TICKS_PER_SECOND, ALL_ACTIONS,
+                        SHAPE_KEYS, BLOCK_COLORS, WHITE, GREY)
+
+# Head-to-head Tetris over TCP. The asyncio server is authoritative: it runs both
+# GameBoards of every match, applies each player's held-key action once per tick,
+# sends garbage rows for cleared lines and relays board deltas to both players.
+#
+# Frames are a little-endian u16 length followed by a payload whose first byte is the type.
+HOST = '127.0.0.1'
+PORT = 7777
+MAX_MATCH_TICKS = 3 * 60 * TICKS_PER_SECOND  # A match still running after 3 minutes is a draw
+GARBAGE_LINES = {1: 0, 2: 1, 3: 2, 4: 4}  # Lines cleared at once -> garbage rows sent
+MAX_INPUTS_PER_TICK = 4  # Extra input frames in one tick are ignored and counted as violations
+MAX_VIOLATIONS = 100  # Disconnect clients that keep sending bad input
+MAX_PENDING_OUTPUT = 64 * 1024  # Disconnect clients that stop reading their deltas
+MAX_FRAME = 1024
+
+# Client -> server
+MSG_HELLO = 1
+MSG_INPUT = 2  # u32 sequence number, u8 held action bitmask
+# Server -> client
+MSG_START = 10  # u8 your player index, 2 x u64 board seeds
+MSG_DELTA = 11  # u32 tick, u8 player, u32 score, u16 lines, u32 pieces, u8 state, block, u8 rows, rows
+MSG_END = 12  # u8 winner (255 for a draw)
+
+FRAME = struct.Struct('<H')
+INPUT = struct.Struct('<BIB')
+START = struct.Struct('<BBQQ')
+DELTA = struct.Struct('<BIBIHIBB')
+BLOCK = struct.Struct('<BBbb')  # shape index (255 for none), rotation, x, y
+END = struct.Struct('<BB')
+NO_BLOCK = 255
+DRAW = 255
+
+STATES = ["menu", "playing", "game_over"]
+# Colour plane cells travel as one byte: 0 empty, 1-7 block colours, 8 garbage
+COLORS = [WHITE] + [BLOCK_COLORS[key] for key in SHAPE_KEYS] + [GREY]
+COLOR_INDEX = {color: index for index, color in enumerate(COLORS)}
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+async def read_frame(reader):
+    """Read one frame payload, or None when the connection closed."""
+    try:
+        header = await reader.readexactly(FRAME.size)
+        (length,) = FRAME.unpack(header)
+        if length == 0 or length > MAX_FRAME:
+            return None
+        return await reader.readexactly(length)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+
+def encode_delta(tick, index, board, rows):
+    """Encode the given changed rows plus the score and falling block of a board."""
+    block = board.current_block
+    out = bytearray(DELTA.pack(MSG_DELTA, tick, index, board.score, board.lines_cleared, board.pieces,
+                               STATES.index(board.game_state), len(rows)))
+    if block is None:
+        out += BLOCK.pack(NO_BLOCK, 0, 0, 0)
+    else:
+        out += BLOCK.pack(SHAPE_KEYS.index(block.shape_key), block.rotation, block.x, block.y)
+    for y in rows:
+        out.append(y)
+        out += bytes(COLOR_INDEX[color] for color in board.board[y])
+    return frame(bytes(out))
+
+def apply_delta(board, payload):
+    """Apply a delta to a client-side mirror board; returns (tick, player index)."""
+    _, tick, index, score, lines, pieces, state, count = DELTA.unpack_from(payload)
+    offset = DELTA.size
+    shape, rotation, x, y = BLOCK.unpack_from(payload, offset)
+    offset += BLOCK.size
+    for _ in range(count):
+        row = payload[offset]
+        cells = payload[offset + 1:offset + 1 + BOARD_WIDTH]
+        offset += 1 + BOARD_WIDTH
+        board.board[row] = [COLORS[cell] for cell in cells]
+        board.rows[row] = sum(1 << col for col, cell in enumerate(cells) if cell)
+        board.row_counts[row] = bin(board.rows[row]).count('1')
+        board.changed_rows.add(row)
+    if count:
+        board.rebuild_heights(0)
+    # Keep the same Block object while it is still the same piece, so policies can track it
+    block = board.current_block
+    if shape == NO_BLOCK:
+        board.current_block = None
+    elif block is None or board.pieces != pieces or block.shape_key != SHAPE_KEYS[shape]:
+        board.current_block = block = Block(SHAPE_KEYS[shape])
+    if board.current_block is not None:
+        block.set_rotation(rotation)
+        block.x = x
+        block.y = y
+    board.score = score
+    board.lines_cleared = lines
+    board.pieces = pieces
+    board.game_state = STATES[state]
+    board.tick = tick
+    return tick, index
+
+class Player:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.match = None
+        self.index = 0
+        self.board = None
+        self.action = 0  # Held keys, applied every tick until the client changes them
+        self.last_sequence = -1
+        self.inputs_this_tick = 0
+        self.violations = 0
+        self.output = bytearray()  # Frames queued during a tick, written once per tick
+        self.last_delta = None  # Block, score and state last relayed, to skip ticks where nothing changed
+        self.connected = True
+
+    def send(self, data):
+        if self.connected:
+            self.output += data
+
+    def flush(self):
+        """Write everything queued this tick in one call; drop clients that don't keep up."""
+        if not self.connected or not self.output:
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_PENDING_OUTPUT:
+            self.disconnect()
+            return
+        self.writer.write(bytes(self.output))
+        self.output.clear()
+
+    def disconnect(self):
+        if self.connected:
+            self.connected = False
+            self.output.clear()
+            self.writer.close()
+
+class Match:
+    def __init__(self, players, seed, max_ticks=MAX_MATCH_TICKS):
+        self.players = players
+        self.rng = random.Random(seed)
+        self.max_ticks = max_ticks
+        self.tick = 0
+        self.over = False
+        for index, player in enumerate(players):
+            player.match = self
+            player.index = index
+            player.board = GameBoard(self.rng.randrange(1 << 32))
+            player.board.start()
+        for player in players:
+            player.send(frame(START.pack(MSG_START, player.index, players[0].board.seed, players[1].board.seed)))
+            for other in players:
+                player.send(encode_delta(0, other.index, other.board, range(BOARD_HEIGHT)))
+        for player in players:
+            player.board.changed_rows.clear()
+
+    def step(self):
+        """Advance both boards one tick, exchange garbage and queue the deltas."""
+        self.tick += 1
+        cleared = []
+        for player in self.players:
+            player.inputs_this_tick = 0
+            lines = player.board.lines_cleared
+            player.board.step(player.action)
+            cleared.append(player.board.lines_cleared - lines)
+        for player, lines in zip(self.players, cleared):
+            garbage = GARBAGE_LINES.get(lines, 0)
+            if garbage:
+                self.players[1 - player.index].board.add_garbage(garbage, self.rng.randrange(BOARD_WIDTH))
+
+        for player in self.players:
+            board = player.board
+            block = board.current_block
+            summary = (block and (block.shape_key, block.rotation, block.x, block.y), board.pieces,
+                       board.score, board.game_state)
+            if not board.changed_rows and summary == player.last_delta:
+                continue
+            player.last_delta = summary
+            delta = encode_delta(self.tick, player.index, board, sorted(board.changed_rows))
+            board.changed_rows.clear()
+            for receiver in self.players:
+                receiver.send(delta)
+
+        lost = [player.board.game_state == "game_over" or not player.connected for player in self.players]
+        if any(lost) or self.tick >= self.max_ticks:
+            self.finish(DRAW if all(lost) or not any(lost) else lost.index(False))
+
+    def finish(self, winner):
+        self.over = True
+        for player in self.players:
+            player.send(frame(END.pack(MSG_END, winner)))
+
+class VersusServer:
+    def __init__(self, host=HOST, port=PORT, seed=None, max_ticks=MAX_MATCH_TICKS):
+        self.host = host
+        self.port = port
+        self.max_ticks = max_ticks
+        self.rng = random.Random(seed)
+        self.waiting = None
+        self.matches = []
+        self.finished = 0
+
+    async def handle_client(self, reader, writer):
+        """Pair the client with the next one to connect, then read its inputs until it leaves."""
+        player = Player(reader, writer)
+        payload = await read_frame(reader)
+        if payload is None or payload[0] != MSG_HELLO:
+            player.disconnect()
+            return
+        if self.waiting is not None and self.waiting.connected:
+            self.matches.append(Match([self.waiting, player], self.rng.randrange(1 << 32), self.max_ticks))
+            self.waiting = None
+        else:
+            self.waiting = player
+
+        while player.connected:
+            payload = await read_frame(reader)
+            if payload is None:
+                break
+            self.handle_input(player, payload)
+        player.disconnect()
+        if self.waiting is player:
+            self.waiting = None
+
+    def handle_input(self, player, payload):
+        """Validate an input frame and update the player's held action."""
+        valid = (len(payload) == INPUT.size and payload[0] == MSG_INPUT and player.match is not None
+                 and player.inputs_this_tick < MAX_INPUTS_PER_TICK)
+        if valid:
+            _, sequence, action = INPUT.unpack(payload)
+            valid = sequence > player.last_sequence and not action & ~ALL_ACTIONS
+        if not valid:
+            player.violations += 1
+            if player.violations > MAX_VIOLATIONS:
+                player.disconnect()
+            return
+        player.inputs_this_tick += 1
+        player.last_sequence = sequence
+        player.action = action
+
+    def step(self):
+        """Advance every match by one tick and flush each client's output once."""
+        for match in self.matches:
+            match.step()
+        for match in self.matches:
+            for player in match.players:
+                player.flush()
+                if match.over:
+                    player.disconnect()
+        still_running = [match for match in self.matches if not match.over]
+        self.finished += len(self.matches) - len(still_running)
+        self.matches = still_running
+
+    async def run_ticks(self):
+        """Step all matches at a fixed rate."""
+        loop = asyncio.get_running_loop()
+        period = 1 / TICKS_PER_SECOND
+        next_tick = loop.time()
+        while True:
+            self.step()
+            next_tick += period
+            delay = next_tick - loop.time()
+            if delay < -period:  # Fell behind, don't try to catch up with a burst
+                next_tick = loop.time()
+            await asyncio.sleep(max(0, delay))
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.run_ticks())
+
+class VersusClient:
+    def __init__(self, host=HOST, port=PORT, policy=None, board_factory=GameBoard, seed=None):
+        """policy(board, rng) picks the held action for our mirror board each tick."""
+        self.host = host
+        self.port = port
+        self.policy = policy
+        self.board_factory = board_factory
+        self.rng = random.Random(seed)
+        self.boards = None
+        self.index = None
+        self.winner = None
+        self.writer = None
+        self.action = 0
+        self.sequence = 0
+
+    async def run(self, on_update=None):
+        """Play one match and return the winner's index (DRAW for a draw, None if the server went away)."""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.writer = writer
+        writer.write(frame(bytes([MSG_HELLO])))
+        try:
+            while True:
+                payload = await read_frame(reader)
+                if payload is None:
+                    return self.winner
+                if payload[0] == MSG_START:
+                    _, self.index, seed0, seed1 = START.unpack(payload)
+                    self.boards = [self.board_factory(seed0), self.board_factory(seed1)]
+                elif payload[0] == MSG_DELTA and self.boards:
+                    _, index = apply_delta(self.boards[payload[5]], payload)
+                    if index == self.index:
+                        board = self.boards[index]
+                        if self.policy and board.game_state == "playing" and board.current_block is not None:
+                            self.set_action(self.policy(board, self.rng))
+                        if on_update:
+                            on_update(self)
+                elif payload[0] == MSG_END:
+                    _, self.winner = END.unpack(payload)
+                    return self.winner
+        finally:
+            writer.close()
+
+    def set_action(self, action):
+        """Send our held action to the server if it changed."""
+        if action != self.action and self.writer is not None and not self.writer.is_closing():
+            self.action = action
+            self.sequence += 1
+            self.writer.write(frame(INPUT.pack(MSG_INPUT, self.sequence, action)))
+
+async def load_test(host, port, matches, policy_name='bot'):
+    """Drive matches bot-vs-bot games against a running server at once and report the results."""
+    from TetrisRunner import POLICIES
+    clients = [VersusClient(host, port, POLICIES[policy_name](), seed=seed) for seed in range(matches * 2)]
+    start = time.perf_counter()
+    winners = await asyncio.gather(*(client.run() for client in clients), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = sum(isinstance(winner, Exception) for winner in winners)
+    ticks = [client.boards[client.index].tick for client in clients if client.boards]
+    return {
+        'clients': len(clients),
+        'errors': errors,
+        'draws': sum(winner == DRAW for winner in winners),
+        'mean_ticks': sum(ticks) / len(ticks) if ticks else 0,
+        'elapsed': elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris versus server and load generator.")
+    parser.add_argument('mode', choices=['server', 'load'])
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--matches', type=int, default=100, help="Concurrent matches for the load generator")
+    parser.add_argument('--policy', default='bot')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--max-ticks', type=int, default=MAX_MATCH_TICKS, help="Server match length limit")
+    args = parser.parse_args()
+
+    if args.mode == 'server':
+        asyncio.run(VersusServer(args.host, args.port, args.seed, args.max_ticks).serve())
+    else:
+        report = asyncio.run(load_test(args.host, args.port, args.matches, args.policy))
+        for key, value in report.items():
+            print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+
+if __name__ == '__main__':
+    main()